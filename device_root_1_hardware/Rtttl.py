@@ -31,32 +31,160 @@ Silicon Labs may update projects from time to time.
 ******************************************************************************
 """
 # Import core modules
+import binascii
 import board
+import struct
 
 # Import application modules
-from Piezo import Piezo
+from Piezo import Piezo, VOLUME_MAX
 from Tick import Tick
 
+# Compiled tune format (all values little endian):
+#   header - magic "RT", version (uint8), name length (uint8), note count (uint16)
+#   name   - name length bytes of ascii
+#   notes  - note count records of frequency hz (uint16), duration ms (uint16)
+COMPILED_MAGIC = b"RT"
+COMPILED_VERSION = const(1)
+COMPILED_HEADER = "<2sBBH"
+COMPILED_HEADER_SIZE = const(6)
+COMPILED_NOTE = "<HH"
+COMPILED_NOTE_SIZE = const(4)
+COMPILED_MS_MAX = const(0xFFFF)
+
+# Library file format (all values little endian):
+#   header - magic "RL", version (uint8), reserved (uint8), tune count (uint16)
+#   index  - tune count entries of name length (uint8), name, offset (uint32), length (uint32)
+#   tunes  - compiled tunes at the offsets (from the start of the file) given in the index
+LIBRARY_MAGIC = b"RL"
+LIBRARY_VERSION = const(1)
+LIBRARY_HEADER = "<2sBBH"
+LIBRARY_HEADER_SIZE = const(6)
+LIBRARY_ENTRY = "<II"
+LIBRARY_ENTRY_SIZE = const(8)
+
+# Tokenizer character classes (separators first so they can be tested with a single compare)
+_CC_COMMA = const(0)
+_CC_COLON = const(1)
+_CC_END = const(2)
+_CC_SPACE = const(3)
+_CC_DIGIT = const(4)
+_CC_NOTE = const(5)
+_CC_SHARP = const(6)
+_CC_DOT = const(7)
+_CC_EQUALS = const(8)
+_CC_OTHER = const(9)
+# Tokenizer sections
+_SECTION_NAME = const(0)
+_SECTION_DEFAULTS = const(1)
+_SECTION_NOTES = const(2)
+_SECTION_HELD = const(3)
+# Tokenizer note states
+_STATE_DURATION = const(0)
+_STATE_PITCH = const(1)
+_STATE_SHARP = const(2)
+_STATE_SUFFIX = const(3)
+_STATE_SKIP = const(4)
+# Tokenizer values
+_PITCH_REST = const(12)
+_PITCH_NONE = const(13)
+_DURATION_DIGITS = const(0b101011110) # Digits 1, 2, 3, 4, 6, 8 may form a duration
+_SHARPS = const(0b001010100101) # Semitones c, d, f, g, a may be sharpened
+_KEY_D = const(1)
+_KEY_O = const(2)
+_KEY_B = const(3)
+# Streamed notes are packed into a small int, frequency in the low bits
+STREAM_MS_SHIFT = const(13)
+STREAM_HZ_MASK = const(0x1FFF)
+_STREAM_CHUNK = const(64)
+# Equal temperament pitch table C0 to B8 (A4 = 440Hz) indexed by (octave * 12) + semitone
+PITCHES = (
+      16,   17,   18,   19,   21,   22,   23,   24,   26,   28,   29,   31, # Octave 0
+      33,   35,   37,   39,   41,   44,   46,   49,   52,   55,   58,   62, # Octave 1
+      65,   69,   73,   78,   82,   87,   92,   98,  104,  110,  117,  123, # Octave 2
+     131,  139,  147,  156,  165,  175,  185,  196,  208,  220,  233,  247, # Octave 3
+     262,  277,  294,  311,  330,  349,  370,  392,  415,  440,  466,  494, # Octave 4
+     523,  554,  587,  622,  659,  698,  740,  784,  831,  880,  932,  988, # Octave 5
+    1047, 1109, 1175, 1245, 1319, 1397, 1480, 1568, 1661, 1760, 1865, 1976, # Octave 6
+    2093, 2217, 2349, 2489, 2637, 2794, 2960, 3136, 3322, 3520, 3729, 3951, # Octave 7
+    4186, 4435, 4699, 4978, 5274, 5588, 5920, 6272, 6645, 7040, 7459, 7902, # Octave 8
+)
+PITCH_A4 = const(57)
+PITCH_OCTAVE_MAX = const(8)
+
+# Semitone frequency ratios 2^(n/12) as 16 bit fixed point, used to transpose at playback
+_SEMITONE_RATIOS = (65536, 69433, 73562, 77936, 82570, 87480, 92682, 98193, 104032, 110218, 116772, 123715)
+
+# Tokenizer lookup tables indexed by character code
+_CHAR_CLASS = bytearray([_CC_OTHER]) * 256
+_CHAR_VALUE = bytearray(256)
+_CHAR_KEY = bytearray(256)
+for _char in range(10):
+    _CHAR_CLASS[0x30 + _char] = _CC_DIGIT
+    _CHAR_VALUE[0x30 + _char] = _char
+for _char, _value in zip(b"cdefgabp", (0, 2, 4, 5, 7, 9, 11, _PITCH_REST)):
+    _CHAR_CLASS[_char] = _CC_NOTE
+    _CHAR_CLASS[_char - 0x20] = _CC_NOTE
+    _CHAR_VALUE[_char] = _value
+    _CHAR_VALUE[_char - 0x20] = _value
+for _char, _value in zip(b"dob", (_KEY_D, _KEY_O, _KEY_B)):
+    _CHAR_KEY[_char] = _value
+    _CHAR_KEY[_char - 0x20] = _value
+_CHAR_CLASS[ord("#")] = _CC_SHARP
+_CHAR_CLASS[ord(".")] = _CC_DOT
+_CHAR_CLASS[ord(",")] = _CC_COMMA
+_CHAR_CLASS[ord(":")] = _CC_COLON
+_CHAR_CLASS[ord("=")] = _CC_EQUALS
+_CHAR_CLASS[ord(" ")] = _CC_SPACE
+
 # Rtttl class
 # Lots of examples at: https://huggingface.co/datasets/cosimoiaia/RTTTL-Ringtones/tree/main
 class Rtttl():
 
     # Initialisation
-    def __init__(self, pin, debug):
+    # The playback timer is owned by scheduler if given
+    def __init__(self, pin, debug, scheduler=None):
         # Initialise
         self.debug = debug
         if self.debug: print(f'Rtttl.init({debug})')        
         self.pin = pin
         self.tunes = {}
         self.tune_names = []
+        self.tune_sources = {}
+        self.tune_sizes = {}
+        self.tune_used = {}
+        self.tune_stamp = 0
+        self.tune_budget = 0
+        self.tune_bytes = 0
+        self.library = {}
+        self.source_hashes = {}
+        self.note_hashes = {}
         self.play_name = None
+        self.play_notes = None
+        self.play_count = 0
         self.play_index = 0
         self.play_repeat = False
-        self.frequencies()        
-        # Initialise piezo
-        self.piezo = Piezo(pin, False)
+        self.play_parser = None
+        self.play_source = None
+        self.play_next = None
+        self.play_timed = False
+        self.play_late = 0
+        self.play_skipped = 0
+        self.play_tempo = 100
+        self.play_transpose = 0
+        self.play_ratio = 0x10000
+        self.play_shift = 16
+        self.play_articulation = 100
+        self.play_volume = VOLUME_MAX
+        self.play_gap = 0
+        self.pitches = PITCHES
+        # Initialise output
+        self.output(pin)
         # Run initial tick timer
-        self.tick = Tick("rtttl", 333, False, False)        
+        self.tick = Tick("rtttl", 333, False, False, scheduler)        
+
+    # Output function, creates the piezo driven note by note from main()
+    def output(self, pin):
+        self.piezo = Piezo(pin, False)
 
     # Main function - call repeatedly to drive playback
     def main(self):
@@ -66,21 +194,72 @@ class Rtttl():
             # Playing ?
             if self.play_name != None:
                 # Reached end of tune ?
-                if self.play_index >= len(self.tunes[self.play_name]):
+                if self.play_index >= self.play_count:
                     # Repeat ?
                     if self.play_repeat:
                         self.play_index = 0
+                        # Streaming ? Restart from the beginning of the source
+                        if self.play_parser != None:
+                            self.stream(self.play_source)
                     # Stop
                     else:
-                        self.play_name = None
+                        self.stop()
             # Something to play ?
             if self.play_name != None:
-                if self.play_index < len(self.tunes[self.play_name]):
+                # Note timeline running ? Measure how late this note is
+                late = 0
+                if self.play_timed:
+                    late = self.tick.late
+                    self.play_late += late
+                # Previous note's silent gap due ? Schedule it on the same timeline
+                if self.play_gap > 0:
+                    gap = self.play_gap
+                    self.play_gap = 0
+                    self.tick.advance(gap)
+                    # Gap not already over ? Play silence
+                    if late < gap:
+                        self.piezo.write(0)
+                        played = True
+                    else:
+                        late -= gap
+                while not played and self.play_index < self.play_count:
+                    note = self.fetch()
+                    hz = note & STREAM_HZ_MASK
+                    ms = note >> STREAM_MS_SHIFT
+                    # Apply tempo and transposition ?
+                    if self.play_tempo != 100:
+                        ms = (ms * 100) // self.play_tempo
+                    # Rounded to nothing ? Play for 1 ms so the timer keeps running
+                    if ms < 1:
+                        ms = 1
+                    if self.play_transpose != 0:
+                        hz = ((hz * self.play_ratio) + (1 << (self.play_shift - 1))) >> self.play_shift
+                    # Articulated ? End of the note is a silent gap
+                    gap = 0
+                    if hz > 0 and self.play_articulation < 100:
+                        gap = ms - ((ms * self.play_articulation) // 100)
+                        # Sounding part rounded to nothing ? Keep 1 ms so the timer keeps running
+                        if gap >= ms:
+                            gap = ms - 1
+                    # Timeline running ?
+                    if self.play_timed:
+                        # Note already over and more to come ? Skip it
+                        if late >= ms and self.play_index < self.play_count:
+                            self.tick.advance(ms)
+                            late -= ms
+                            self.play_skipped += 1
+                            continue
+                        # Schedule from the previous note's deadline
+                        self.tick.advance(ms - gap)
+                    # Start timeline from now
+                    else:
+                        self.tick.write(ms - gap, False)
+                        self.play_timed = True
                     # Play note
-                    self.piezo.write(self.tunes[self.play_name][self.play_index][0])
-                    self.tick.write(self.tunes[self.play_name][self.play_index][1], False)
-                    self.play_index += 1
+                    self.play_gap = gap
+                    self.piezo.write(hz)
                     played = True
+                    break
             # Didn't play anything ?
             if not played:
                 # Piezo is on?
@@ -89,17 +268,66 @@ class Rtttl():
                     self.piezo.write(0)
                 # Restart timer
                 self.tick.write(333, False)
+                self.play_timed = False
       
+    # Fetch function, returns the next note packed as hz | (ms << STREAM_MS_SHIFT) and moves on
+    def fetch(self):
+        # Streaming ? Return the decoded note then decode the one after it
+        if self.play_parser != None:
+            note = self.play_next
+            self.play_next = self.advance(self.play_parser)
+            if self.play_next != None:
+                self.play_count += 1
+        # Compiled (read directly from the packed little endian record)
+        else:
+            notes = self.play_notes
+            offset = self.play_index * COMPILED_NOTE_SIZE
+            note = notes[offset] | (notes[offset + 1] << 8) | ((notes[offset + 2] | (notes[offset + 3] << 8)) << STREAM_MS_SHIFT)
+        self.play_index += 1
+        return note
+
     # Play tune function
-    def play(self, tune_name, repeat):
+    # tune_name may also be RTTTL text or an open RTTTL file, these are streamed without loading
+    # tempo is a percentage of the tune's own tempo, transpose shifts the pitch in semitones
+    # volume is a level from 0 (silent) to VOLUME_MAX
+    def play(self, tune_name, repeat, tempo=100, transpose=0, volume=VOLUME_MAX):
         result = False
         if tune_name != None:
+            # Not loaded (or evicted) ? Reload it from its source
+            if tune_name in self.tune_sources or tune_name in self.library:
+                if tune_name not in self.tunes:
+                    self.reload(tune_name)
             if tune_name in self.tunes:
+                self.tune_stamp += 1
+                self.tune_used[tune_name] = self.tune_stamp
                 self.play_name = tune_name
+                self.play_notes = self.tunes[tune_name]
+                self.play_count = self.count(tune_name)
                 self.play_index = 0
-                self.play_repeat = repeat
+                self.play_parser = None
                 result = True
-        if self.debug: print(f'Rtttl.play("{tune_name}", {repeat}) = {result}')
+                # Previous tune no longer pinned
+                self.evict(tune_name)
+            elif isinstance(tune_name, str):
+                if tune_name.find(":") > -1:
+                    result = self.stream(tune_name.encode())
+            elif hasattr(tune_name, "readinto"):
+                result = self.stream(tune_name)
+            if result:
+                self.play_repeat = repeat
+                self.play_tempo = tempo if tempo > 0 else 100
+                self.play_transpose = transpose
+                # Semitone ratio then whole octaves folded into the fixed point shift
+                self.play_ratio = _SEMITONE_RATIOS[transpose % 12]
+                self.play_shift = max(1, 16 - (transpose // 12))
+                self.play_volume = volume
+                if self.piezo != None:
+                    self.piezo.volume(volume)
+                self.play_gap = 0
+                self.play_late = 0
+                self.play_skipped = 0
+                self.restart()
+        if self.debug: print(f'Rtttl.play("{self.play_name if result else tune_name}", {repeat}, {tempo}, {transpose}, {volume}) = {result}')
         return result
 
     # Stop tune function
@@ -107,187 +335,521 @@ class Rtttl():
         result = False
         if self.play_name != None:
             self.play_name = None
+            self.play_notes = None
+            self.play_parser = None
+            self.play_source = None
+            self.play_next = None
+            self.play_gap = 0
+            self.restart()
             result = True
         if self.debug: print(f'Rtttl.stop() = {result}')
         return result
 
+    # Seek function, moves playback of a loaded tune to a note index
+    def seek(self, index):
+        result = False
+        if self.play_name != None and self.play_parser == None and index < self.play_count:
+            self.play_index = index
+            self.play_gap = 0
+            self.restart()
+            result = True
+        if self.debug: print(f'Rtttl.seek({index}) = {result}')
+        return result
+
+    # Restart function, fires the timer on the next pass so a new tune or position takes over from the current note
+    def restart(self):
+        self.play_timed = False
+        self.tick.write(1, False)
+
+    # Stream function, starts playback of encoded RTTTL text or an open RTTTL file
+    def stream(self, source):
+        result = False
+        # Encoded text ?
+        if isinstance(source, (bytes, bytearray)):
+            parser = self.parse(source, source.count(b":"), False)
+        # File ? Count the section separators first so it is split (or rejected) as load() would
+        else:
+            colons = 0
+            chunk = bytearray(_STREAM_CHUNK)
+            source.seek(0)
+            count = source.readinto(chunk)
+            while count:
+                for index in range(count):
+                    if _CHAR_CLASS[chunk[index]] == _CC_COLON:
+                        colons += 1
+                count = source.readinto(chunk)
+            source.seek(0)
+            parser = self.parse(source, colons, False)
+        name = next(parser)
+        if name != None and len(name) > 0:
+            note = self.advance(parser)
+            if note != None:
+                self.play_name = name
+                self.play_notes = None
+                self.play_parser = parser
+                self.play_source = source
+                self.play_next = note
+                self.play_count = 1
+                self.play_index = 0
+                result = True
+        return result
+
+    # Advance function, returns the next streamed note or None at the end of the tune
+    def advance(self, parser):
+        try:
+            return next(parser)
+        except StopIteration:
+            return None
+
     # Load tune function
     def load(self, rtttl, debug):
         if debug: print(f'Rtttl.load("{rtttl}")')
+        data = rtttl.encode()
+        # Same text already loaded ? Nothing to parse
+        source_hash = binascii.crc32(data)
+        tune_name = self.source_hashes.get(source_hash)
+        if tune_name != None and tune_name in self.tunes and self.tune_sources.get(tune_name) == rtttl:
+            # Just asked for so most recently used
+            self.tune_stamp += 1
+            self.tune_used[tune_name] = self.tune_stamp
+            if debug: print(f'Rtttl.load()={tune_name} (interned)')
+            return tune_name
         # Assume invalid
         tune_name = None
-        # Remove spaces and convert to lower case
-        rtttl = rtttl.replace(" ", "").lower()
-        # Split on colons
-        rtttl_parts = rtttl.split(":")
-        rtttl_parts_count = len(rtttl_parts)
-        if debug: print(f'rtttl_parts = {rtttl_parts}')
-        # Got two parts ? 
-        if rtttl_parts_count == 2 or rtttl_parts_count == 3: 
-            # Extract name
-            name = rtttl_parts[0]
-            if debug: print(f'name = "{name}"')
-            # Extract defaults
-            duration = 4
-            octave = 6
-            bpm = 63                    
-            notes_index = 1
-            if rtttl_parts_count == 3:
-                notes_index = 2
-                defaults = rtttl_parts[1].split(",")
-                for default in defaults:
-                    # Default duration
-                    index = default.find("d=")
-                    if index == 0: 
-                        value_str = default[index+2:]
-                        try:
-                            value_int = int(value_str)
-                            if value_int in [1, 2, 4, 8, 16, 32]:
-                                duration = value_int
-                        except:
-                            pass
-                    # Default octave
-                    index = default.find("o=")
-                    if index == 0: 
-                        value_str = default[index+2:]
-                        try:
-                            value_int = int(value_str)
-                            if value_int >= 4 and value_int <= 7:
-                                octave = value_int 
-                        except:
-                            pass
-                    # Default bpm
-                    index = default.find("b=")
-                    if index == 0: 
-                        value_str = default[index+2:]
-                        try:
-                            value_int = int(value_str)
-                            if value_int >= 25 and value_int <= 900:
-                                bpm = value_int 
-                        except:
-                            pass
-            # Calculate length of a whole note
-            # Ensure a whole note is a multiple of a 32nd note
-            whole_ms = (60000 * duration) // bpm
-            whole_ms //= 32
-            whole_ms *= 32
-            if debug: print(f'defaults: d = {duration}, o = {octave}, b = {bpm}, whole_ms = {whole_ms}')                                                                                        
-            # Extract note data
-            notes = []
-            datas = rtttl_parts[notes_index].split(",")
-            for data in datas:
-                d_string = ""
-                p_string = ""
-                o_string = ""
-                dot = False
-                state = 0
-                index = 0
-                while index < len(data):
-                    if state == 0: # Looking for duration (optional)
-                        if data[index] in ["1", "2", "3", "4", "6", "8"]:
-                            d_string += data[index]
-                            index += 1
-                        else:
-                            state = 1
-                    elif state == 1: # Looking for pitch note letter (mandatory)
-                        if data[index] in ["a", "b", "c", "d", "e", "f", "g", "p"]:
-                            p_string += data[index]
-                            index += 1
-                        else:
-                            p_string += "p"
-                        if p_string == "p":
-                            state = 4
-                        else:
-                            state = 2
-                    elif state == 2: # Looking for sharp (optional)
-                        if data[index] == "#":
-                            p_string += data[index]
-                            index += 1
-                        else:
-                            state = 3
-                    elif state == 3: # looking for octave or dot (optional - sometimes in different orders)
-                        if data[index] in ["4", "5", "6", "7"]:
-                            if len(o_string) == 0:
-                                o_string += data[index]
-                        elif data[index] == ".":
-                            dot = True
-                        index += 1                            
-                    else:
-                        index += 1
-                if d_string not in ["1", "2", "4", "8", "16", "32"]:
-                    d_string = str(duration)
-                if o_string == "":
-                    p_string += str(octave)
-                else: 
-                    p_string += o_string
-                d_int = int(d_string)
-                ms = whole_ms // d_int
-                hz = 0
-                if dot: ms += (ms//2)
-                if p_string in self.frequencies:
-                    hz = self.frequencies[p_string]
-                notes.append((hz, ms))
-                if debug: print(f'data="{data}", d="{d_string}", dot={dot}, ms={ms}, p="{p_string}", hz={hz}')
+        parser = self.parse(data, data.count(b":"), debug)
+        name = next(parser)
+        if name != None:
+            # Extract note data straight into packed records (one note per comma separated field)
+            notes = bytearray((data.count(b",", data.rfind(b":")) + 1) * COMPILED_NOTE_SIZE)
+            offset = 0
+            for note in parser:
+                hz = note & STREAM_HZ_MASK
+                ms = note >> STREAM_MS_SHIFT
+                notes[offset] = hz & 0xFF
+                notes[offset + 1] = hz >> 8
+                notes[offset + 2] = ms & 0xFF
+                notes[offset + 3] = ms >> 8
+                offset += COMPILED_NOTE_SIZE
             # Have a name and some notes ?
-            if len(name) > 0 and len(notes) > 0:
+            if len(name) > 0 and offset > 0:
                 tune_name = name
-                self.tunes[tune_name] = notes
-                self.tune_names = list(self.tunes)
+                self.store(tune_name, notes, rtttl, len(notes))
+                self.source_hashes[source_hash] = tune_name
             if debug: print(f'Rtttl.load()={tune_name}')
-            return tune_name
+        return tune_name
+
+    # Parse generator - single pass tokenizer driven by the character tables
+    # Yields the tune name (None if invalid) then each note packed as hz | (ms << STREAM_MS_SHIFT)
+    # Source is encoded RTTTL text or a file read in chunks, colons is the number of section separators if known
+    def parse(self, source, colons, debug):
+        # Name, defaults and notes sections separated by colons (defaults optional)
+        if colons != None and colons != 1 and colons != 2:
+            yield None
+            return
+        # Encoded text ?
+        if isinstance(source, (bytes, bytearray)):
+            stream = None
+            data = source
+            count = len(data)
+        # File
+        else:
+            stream = source
+            chunk = bytearray(_STREAM_CHUNK)
+            data = chunk
+            count = 0
+        index = 0
+        section = _SECTION_NAME
+        name = bytearray()
+        held = None
+        # Defaults
+        duration = 4
+        octave = 6
+        bpm = 63
+        whole_ms = 0
+        key = 0
+        value = 0
+        digits = 0
+        position = 0
+        # Note
+        state = _STATE_DURATION
+        note_duration = 0
+        note_pitch = _PITCH_NONE
+        note_octave = -1
+        note_sharps = 0
+        note_dot = False
+        while True:
+            # Classify character
+            if index < count:
+                char = data[index]
+                char_class = _CHAR_CLASS[char]
+            # Need more data ?
+            else:
+                index = 0
+                count = 0
+                if stream != None:
+                    data = chunk
+                    count = stream.readinto(chunk)
+                    if count == None:
+                        count = 0
+                if count > 0:
+                    continue
+                char_class = _CC_END
+            index += 1
+            # Spaces are ignored
+            if char_class == _CC_SPACE:
+                pass
+            elif section == _SECTION_NOTES:
+                # Another section ? Too many colons, the tune is invalid
+                if char_class == _CC_COLON:
+                    if debug: print(f'invalid: too many sections')
+                    return
+                # End of note ?
+                if char_class <= _CC_END:
+                    # First note ?
+                    if whole_ms == 0:
+                        # Calculate length of a whole note
+                        # Ensure a whole note is a multiple of a 32nd note
+                        whole_ms = (60000 * duration) // bpm
+                        whole_ms //= 32
+                        whole_ms *= 32
+                        if debug: print(f'defaults: d = {duration}, o = {octave}, b = {bpm}, whole_ms = {whole_ms}')
+                    if note_duration > 32 or note_duration & (note_duration - 1) != 0 or note_duration == 0:
+                        note_duration = duration
+                    ms = whole_ms // note_duration
+                    if note_dot: ms += (ms//2)
+                    if ms > COMPILED_MS_MAX: ms = COMPILED_MS_MAX
+                    hz = 0
+                    if note_pitch < _PITCH_REST:
+                        if note_sharps == 0 or (note_sharps == 1 and (_SHARPS >> note_pitch) & 1):
+                            if note_octave < 0:
+                                note_octave = octave
+                            hz = self.pitches[(note_octave * 12) + note_pitch + note_sharps]
+                    if debug: print(f'd={note_duration}, dot={note_dot}, ms={ms}, hz={hz}')
+                    yield hz | (ms << STREAM_MS_SHIFT)
+                    # End of tune ?
+                    if char_class != _CC_COMMA:
+                        return
+                    state = _STATE_DURATION
+                    note_duration = 0
+                    note_pitch = _PITCH_NONE
+                    note_octave = -1
+                    note_sharps = 0
+                    note_dot = False
+                elif state == _STATE_DURATION: # Looking for duration (optional)
+                    if char_class == _CC_DIGIT and (_DURATION_DIGITS >> _CHAR_VALUE[char]) & 1:
+                        if note_duration <= 32:
+                            note_duration = (note_duration * 10) + _CHAR_VALUE[char]
+                    else:
+                        state = _STATE_PITCH
+                        index -= 1
+                elif state == _STATE_PITCH: # Looking for pitch note letter (mandatory)
+                    if char_class == _CC_NOTE:
+                        note_pitch = _CHAR_VALUE[char]
+                    else:
+                        note_pitch = _PITCH_REST
+                        index -= 1
+                    if note_pitch == _PITCH_REST:
+                        state = _STATE_SKIP
+                    else:
+                        state = _STATE_SHARP
+                elif state == _STATE_SHARP: # Looking for sharp (optional)
+                    if char_class == _CC_SHARP:
+                        note_sharps += 1
+                    else:
+                        state = _STATE_SUFFIX
+                        index -= 1
+                elif state == _STATE_SUFFIX: # looking for octave or dot (optional - sometimes in different orders)
+                    if char_class == _CC_DIGIT:
+                        if note_octave < 0 and _CHAR_VALUE[char] <= PITCH_OCTAVE_MAX:
+                            note_octave = _CHAR_VALUE[char]
+                    elif char_class == _CC_DOT:
+                        note_dot = True
+            elif section == _SECTION_DEFAULTS:
+                # End of default ?
+                if char_class <= _CC_END:
+                    if key != 0 and digits > 0:
+                        if key == _KEY_D:
+                            if value <= 32 and value & (value - 1) == 0 and value > 0:
+                                duration = value
+                        elif key == _KEY_O:
+                            if value <= PITCH_OCTAVE_MAX:
+                                octave = value
+                        elif key == _KEY_B:
+                            if value >= 25 and value <= 900:
+                                bpm = value
+                    key = 0
+                    value = 0
+                    digits = 0
+                    position = 0
+                    # End of defaults ?
+                    if char_class == _CC_COLON:
+                        section = _SECTION_NOTES
+                    elif char_class == _CC_END:
+                        return
+                else:
+                    # Key letter ?
+                    if position == 0:
+                        key = _CHAR_KEY[char]
+                    # Equals ?
+                    elif position == 1:
+                        if char_class != _CC_EQUALS:
+                            key = 0
+                    # Value digit ?
+                    elif char_class == _CC_DIGIT:
+                        if value < 10000:
+                            value = (value * 10) + _CHAR_VALUE[char]
+                        digits += 1
+                    # Anything else invalidates the default
+                    else:
+                        key = 0
+                    position += 1
+            elif section == _SECTION_NAME:
+                # End of name ?
+                if char_class == _CC_COLON:
+                    name = name.decode().lower()
+                    if debug: print(f'name = "{name}"')
+                    yield name
+                    # Defaults present, absent or not yet known ?
+                    if colons == 2:
+                        section = _SECTION_DEFAULTS
+                    elif colons == 1:
+                        section = _SECTION_NOTES
+                    else:
+                        section = _SECTION_HELD
+                        held = bytearray()
+                elif char_class == _CC_END:
+                    yield None
+                    return
+                else:
+                    name.append(char)
+            # Streamed second section - hold until it is known to be defaults (another colon) or notes
+            else:
+                # End of section ?
+                if char_class == _CC_COLON or char_class == _CC_END:
+                    # Second section held as defaults ?
+                    if char_class == _CC_COLON:
+                        section = _SECTION_DEFAULTS
+                    # Second section held as notes
+                    else:
+                        section = _SECTION_NOTES
+                    # Replay held characters followed by the rest of the data
+                    held.extend(data[index - 1:count])
+                    data = held
+                    count = len(data)
+                    index = 0
+                    held = None
+                else:
+                    held.append(char)
+
+    # Load compiled tune function (buf is referenced, not copied)
+    def load_compiled(self, buf, debug):
+        tune_name, notes = self.unpack(buf)
+        # Referenced buffer is not counted against the budget
+        if tune_name != None:
+            self.store(tune_name, notes, buf, 0)
+        if debug: print(f'Rtttl.load_compiled({len(buf)}) = {tune_name}')
+        return tune_name
+
+    # Unpack function, returns the name and a view of the notes in a compiled tune (None, None if invalid)
+    def unpack(self, buf):
+        if len(buf) >= COMPILED_HEADER_SIZE:
+            magic, version, name_len, count = struct.unpack_from(COMPILED_HEADER, buf, 0)
+            notes_start = COMPILED_HEADER_SIZE + name_len
+            notes_end = notes_start + (count * COMPILED_NOTE_SIZE)
+            # Valid header and complete ?
+            if magic == COMPILED_MAGIC and version == COMPILED_VERSION and name_len > 0 and count > 0 and len(buf) >= notes_end:
+                view = memoryview(buf)
+                return bytes(view[COMPILED_HEADER_SIZE:notes_start]).decode(), view[notes_start:notes_end]
+        return None, None
+
+    # Store function, adds a tune with its reload source then evicts tunes to stay within the budget
+    # Notes identical to a tune already loaded share its buffer (still counted against the budget per name)
+    def store(self, tune_name, notes, source, size):
+        notes_hash = binascii.crc32(notes)
+        shared = self.note_hashes.get(notes_hash)
+        if shared != None and shared != tune_name and shared in self.tunes and bytes(self.tunes[shared]) == bytes(notes):
+            notes = self.tunes[shared]
+        else:
+            self.note_hashes[notes_hash] = tune_name
+        # Replacing ?
+        if tune_name in self.tunes:
+            self.tune_bytes -= self.tune_sizes[tune_name]
+        # New tune ?
+        elif tune_name not in self.tune_sources:
+            self.tune_names.append(tune_name)
+        self.tunes[tune_name] = notes
+        self.tune_sources[tune_name] = source
+        self.tune_sizes[tune_name] = size
+        self.tune_bytes += size
+        self.tune_stamp += 1
+        self.tune_used[tune_name] = self.tune_stamp
+        self.evict(tune_name)
+
+    # Reload function, reloads an evicted tune from the text, buffer or library it came from
+    def reload(self, tune_name):
+        source = self.tune_sources.get(tune_name)
+        if isinstance(source, str):
+            result = self.load(source, False)
+        elif source != None:
+            result = self.load_compiled(source, False)
+        else:
+            result = self.load_library(tune_name, False)
+        if self.debug: print(f'Rtttl.reload("{tune_name}") = {result}')
+        return result
+
+    # Unload function, forgets a loaded (or evicted) tune along with its reload source, a playing tune is stopped
+    def unload(self, tune_name):
+        result = False
+        if tune_name in self.tune_sources:
+            if tune_name == self.play_name:
+                self.stop()
+            # Still loaded ?
+            if tune_name in self.tunes:
+                self.drop(tune_name)
+            source = self.tune_sources.pop(tune_name)
+            if isinstance(source, str):
+                source_hash = binascii.crc32(source.encode())
+                if self.source_hashes.get(source_hash) == tune_name:
+                    del self.source_hashes[source_hash]
+            self.tune_names.remove(tune_name)
+            result = True
+        if self.debug: print(f'Rtttl.unload("{tune_name}") = {result}')
+        return result
+
+    # Limit function, sets the budget in bytes for loaded tunes (0 for unlimited)
+    def limit(self, budget):
+        self.tune_budget = budget
+        self.evict(None)
+        if self.debug: print(f'Rtttl.limit({budget}) = {self.tune_bytes}')
+        return self.tune_bytes
+
+    # Evict function, drops least recently played tunes until within the budget
+    # The playing tune and keep are never evicted
+    def evict(self, keep):
+        while self.tune_budget > 0 and self.tune_bytes > self.tune_budget:
+            oldest = None
+            for tune_name in self.tunes:
+                if tune_name != keep and tune_name != self.play_name and self.tune_sizes[tune_name] > 0:
+                    if oldest == None or self.tune_used[tune_name] < self.tune_used[oldest]:
+                        oldest = tune_name
+            # Nothing left to evict ?
+            if oldest == None:
+                break
+            self.drop(oldest)
+            if self.debug: print(f'Rtttl.evict("{oldest}") = {self.tune_bytes}')
+
+    # Drop function, frees the notes of a loaded tune (its reload source is kept)
+    def drop(self, tune_name):
+        notes_hash = binascii.crc32(self.tunes[tune_name])
+        if self.note_hashes.get(notes_hash) == tune_name:
+            del self.note_hashes[notes_hash]
+        self.tune_bytes -= self.tune_sizes[tune_name]
+        del self.tunes[tune_name]
+        del self.tune_sizes[tune_name]
+        del self.tune_used[tune_name]
+
+    # Open library function, reads the index of a library file so its tunes can be loaded by name
+    def open_library(self, path, debug):
+        result = 0
+        try:
+            with open(path, "rb") as file:
+                magic, version, reserved, count = struct.unpack(LIBRARY_HEADER, file.read(LIBRARY_HEADER_SIZE))
+                if magic == LIBRARY_MAGIC and version == LIBRARY_VERSION:
+                    for index in range(count):
+                        name = file.read(file.read(1)[0]).decode()
+                        offset, length = struct.unpack(LIBRARY_ENTRY, file.read(LIBRARY_ENTRY_SIZE))
+                        self.library[name] = (path, offset, length)
+                        result += 1
+        except Exception as error:
+            if debug: print(f'WARNING: Rtttl could not read library "{path}" {error}')
+        if debug: print(f'Rtttl.open_library("{path}") = {result}')
+        return result
+
+    # Load library tune function, seeks to and loads a single tune from an opened library
+    def load_library(self, tune_name, debug):
+        result = None
+        if tune_name in self.library:
+            path, offset, length = self.library[tune_name]
+            buf = bytearray(length)
+            try:
+                with open(path, "rb") as file:
+                    file.seek(offset)
+                    if file.readinto(buf) == length:
+                        result, notes = self.unpack(buf)
+                        # Library buffer is owned so is counted against the budget
+                        if result != None:
+                            self.store(result, notes, None, length)
+            except OSError as error:
+                if debug: print(f'WARNING: Rtttl could not read library "{path}" {error}')
+        if debug: print(f'Rtttl.load_library("{tune_name}") = {result}')
+        return result
+
+    # Save library function, writes loaded tunes to a library file
+    def save_library(self, path, tune_names):
+        compiled = []
+        for tune_name in tune_names:
+            buf = self.compile(tune_name)
+            if buf != None:
+                compiled.append((tune_name.encode(), buf))
+        # Tunes follow the header and index
+        offset = LIBRARY_HEADER_SIZE
+        for name, buf in compiled:
+            offset += 1 + len(name) + LIBRARY_ENTRY_SIZE
+        with open(path, "wb") as file:
+            file.write(struct.pack(LIBRARY_HEADER, LIBRARY_MAGIC, LIBRARY_VERSION, 0, len(compiled)))
+            for name, buf in compiled:
+                file.write(bytes((len(name),)))
+                file.write(name)
+                file.write(struct.pack(LIBRARY_ENTRY, offset, len(buf)))
+                offset += len(buf)
+            for name, buf in compiled:
+                file.write(buf)
+        return len(compiled)
+
+    # Note count accessor
+    def count(self, tune_name):
+        return len(self.tunes[tune_name]) // COMPILED_NOTE_SIZE
+
+    # Note frequency accessor
+    def hz(self, tune_name, index):
+        offset = index * COMPILED_NOTE_SIZE
+        return self.tunes[tune_name][offset] | (self.tunes[tune_name][offset + 1] << 8)
+
+    # Note duration accessor
+    def ms(self, tune_name, index):
+        offset = (index * COMPILED_NOTE_SIZE) + 2
+        return self.tunes[tune_name][offset] | (self.tunes[tune_name][offset + 1] << 8)
+
+    # Compile tune function, returns loaded tune in compiled format
+    def compile(self, tune_name):
+        result = None
+        if tune_name in self.tunes and len(tune_name.encode()) <= 0xFF:
+            notes = self.tunes[tune_name]
+            name = tune_name.encode()
+            result = bytearray(COMPILED_HEADER_SIZE + len(name) + len(notes))
+            struct.pack_into(COMPILED_HEADER, result, 0, COMPILED_MAGIC, COMPILED_VERSION, len(name), len(notes) // COMPILED_NOTE_SIZE)
+            result[COMPILED_HEADER_SIZE:COMPILED_HEADER_SIZE + len(name)] = name
+            result[COMPILED_HEADER_SIZE + len(name):] = notes
+        return result
+
+    # Tuning function, rebuilds the pitch table for a different A4 reference frequency (applies to tunes parsed after the call)
+    def tuning(self, a4):
+        if a4 == 440:
+            self.pitches = PITCHES
+        else:
+            pitches = []
+            for pitch in range(len(PITCHES)):
+                hz = round(a4 * (2 ** ((pitch - PITCH_A4) / 12)))
+                # Above B8 ? Too high for the piezo (and the packed note) so rest
+                pitches.append(hz if hz <= PITCHES[-1] else 0)
+            self.pitches = tuple(pitches)
+        if self.debug: print(f'Rtttl.tuning({a4})')
 
-    # Initialise frequencies
-    def frequencies(self):
-        # Frequencies
-        self.frequencies = {
-        "p"   :    0,
-        "c4"  :  262,
-        "c#4" :  277,
-        "d4"  :  294,
-        "d#4" :  311,
-        "e4"  :  330,
-        "f4"  :  349,
-        "f#4" :  370,
-        "g4"  :  392,
-        "g#4" :  415, 
-        "a4"  :  440,
-        "a#4" :  466,
-        "b4"  :  494,
-        "c5"  :  523,
-        "c#5" :  554,
-        "d5"  :  587,
-        "d#5" :  622,
-        "e5"  :  659,
-        "f5"  :  698,
-        "f#5" :  740,
-        "g5"  :  784,
-        "g#5" :  831,
-        "a5"  :  880,
-        "a#5" :  932,
-        "b5"  :  988,
-        "c6"  : 1047,
-        "c#6" : 1109,
-        "d6"  : 1175,
-        "d#6" : 1245,
-        "e6"  : 1319,
-        "f6"  : 1397,
-        "f#6" : 1480,
-        "g6"  : 1568,
-        "g#6" : 1661,
-        "a6"  : 1760,
-        "a#6" : 1865,
-        "b6"  : 1976,
-        "c7"  : 2093,
-        "c#7" : 2217,
-        "d7"  : 2349,
-        "d#7" : 2489,
-        "e7"  : 2637,
-        "f7"  : 2794,
-        "f#7" : 2960,
-        "g7"  : 3136,
-        "g#7" : 3322,
-        "a7"  : 3520,
-        "a#7" : 3729,
-        "b7"  : 3951}
+    # Articulate function, sets the percentage of each note that sounds (100 legato, 50 staccato)
+    # The rest of the note is a silent gap so repeated notes are heard separately
+    def articulate(self, percent):
+        self.play_articulation = max(1, min(100, percent))
+        if self.debug: print(f'Rtttl.articulate({percent}) = {self.play_articulation}')
+        return self.play_articulation
 
 # Rtttl class (END)
\ No newline at end of file
@@ -35,6 +35,10 @@ import board
 import pwmio
 import atexit
 
+# Volume levels 0 (silent) to VOLUME_MAX, duty cycles giving 3dB steps up to the loudest at 50% duty
+VOLUME_MAX = const(10)
+VOLUME_DUTY = (0x0000, 0x03A4, 0x0525, 0x0746, 0x0A49, 0x0E91, 0x14B1, 0x1D8E, 0x2AC7, 0x4019, 0x8000)
+
 # Piezo class
 class Piezo():
 
@@ -48,6 +52,13 @@ class Piezo():
         atexit.register(self.deinit)
         self.on = False
         self.frequency = 0
+        self.level = VOLUME_MAX
+        self.duty = VOLUME_DUTY[VOLUME_MAX]
+        # Hardware state, registers are only written when they change
+        self.pwm_frequency = self.pwmio.frequency
+        self.pwm_duty = self.pwmio.duty_cycle
+        self.writes = 0
+        self.avoided = 0
 
     # Write function
     def write(self, frequency):
@@ -58,13 +69,36 @@ class Piezo():
         else:
             self.on = False
             self.frequency = 0
-        if self.on: 
-            self.pwmio.frequency = self.frequency
-            self.pwmio.duty_cycle = 0x8000
+        # Playing ? Frequency needs changing ?
+        if self.on:
+            if self.pwm_frequency != self.frequency:
+                self.pwmio.frequency = self.frequency
+                self.pwm_frequency = self.frequency
+                self.writes += 1
+            else:
+                self.avoided += 1
+            duty = self.duty
+        # Silent (frequency left as it is)
+        else:
+            self.avoided += 1
+            duty = 0
+        # Duty cycle needs changing ?
+        if self.pwm_duty != duty:
+            self.pwmio.duty_cycle = duty
+            self.pwm_duty = duty
+            self.writes += 1
         else:
-            self.pwmio.duty_cycle = 0
-            self.pwmio.frequency = 262
-        if self.debug: print(f'Piezo.write({self.pin}, {self.frequency})')
+            self.avoided += 1
+        if self.debug: print(f'Piezo.write({self.pin}, {self.frequency}) writes={self.writes} avoided={self.avoided}')
+
+    # Volume function, sets the level used by writes (applied now if playing)
+    def volume(self, level):
+        self.level = max(0, min(VOLUME_MAX, level))
+        self.duty = VOLUME_DUTY[self.level]
+        if self.on:
+            self.write(self.frequency)
+        if self.debug: print(f'Piezo.volume({self.pin}, {level}) = {self.level}')
+        return self.level
 
     # Deinit function
     def deinit(self):
@@ -0,0 +1,215 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import application modules
+from Clock import default_clock
+
+# Timeline and sequence numbers are rebased before they reach this, keeping them small ints
+_REBASE = const(1<<28)
+
+# Heap push function, adds an entry to a list kept as a binary min-heap
+def _push(heap, entry):
+    heap.append(entry)
+    index = len(heap) - 1
+    while index > 0:
+        parent = (index - 1) >> 1
+        if heap[parent] <= entry:
+            break
+        heap[index] = heap[parent]
+        index = parent
+    heap[index] = entry
+
+# Heap pop function, removes and returns the smallest entry
+def _pop(heap):
+    top = heap[0]
+    entry = heap.pop()
+    count = len(heap)
+    if count > 0:
+        index = 0
+        while True:
+            child = (index << 1) + 1
+            if child >= count:
+                break
+            if child + 1 < count and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[index] = heap[child]
+            index = child
+        heap[index] = entry
+    return top
+
+# Call class - handle for a function called by a scheduler, returned by call_later() and call_every()
+class Call():
+
+    # Initialisation
+    def __init__(self, scheduler, function, period):
+        self.scheduler = scheduler
+        self.function = function
+        self.period = period
+        self.name = "call"
+        self.sequence = 0
+        self.fired = False
+        self.late = 0
+        self.overruns = 0
+
+    # Expire function, requeues a repeating call by whole periods then calls the function
+    def expire(self, late):
+        self.fired = True
+        self.late = late
+        if self.period > 0:
+            missed = late // self.period
+            self.overruns += missed
+            self.scheduler.queue(self, self.scheduler.time - late + ((missed + 1) * self.period))
+        self.function()
+
+    # Cancel function, stops any further calls
+    def cancel(self):
+        return self.scheduler.unqueue(self)
+
+    # Pending function, returns True while a call is due
+    def pending(self):
+        return self.sequence != 0
+
+# Scheduler class - owns Tick timers and calls, reads the clock once per pass and fires only the expired ones
+class Scheduler():
+
+    # Initialisation
+    # clock provides ticks_ms() for the scheduler and its timers (default: the platform clock)
+    def __init__(self, debug, clock=None):
+        # Initialise
+        self.debug = debug
+        if self.debug: print(f'Scheduler.init({debug})')
+        self.clock = clock if clock != None else default_clock()
+        self.ticks_max = self.clock.period - 1
+        self.ticks_halfperiod = self.clock.period >> 1
+        self.now = self.clock.ticks_ms()
+        # Milliseconds since initialisation or the last rebase, deadlines are kept on this timeline
+        self.time = 0
+        # Heap of (deadline, sequence, tick or call), entries are stale once requeued or cancelled
+        self.heap = []
+        self.sequence = 0
+        self.stale = 0
+        self.expired = []
+
+    # Main function - call once per pass before reading the timers
+    def main(self):
+        # Timers fired last pass no longer have fired set
+        for item in self.expired:
+            item.fired = False
+        self.expired = []
+        # Read clock
+        now = self.clock.ticks_ms()
+        self.time += (now - self.now) & self.ticks_max
+        self.now = now
+        # Timeline or sequence numbers grown large ? Rebase them
+        if self.time >= _REBASE or self.sequence >= _REBASE:
+            self.rebase()
+        # Fire expired timers and calls
+        while len(self.heap) > 0 and self.heap[0][0] <= self.time:
+            deadline, sequence, item = _pop(self.heap)
+            if sequence == item.sequence:
+                item.sequence = 0
+                self.expired.append(item)
+                item.expire(self.time - deadline)
+            else:
+                self.stale -= 1
+        if self.debug and len(self.expired) > 0: print(f'Scheduler.main() = {[item.name for item in self.expired]}')
+        return len(self.expired)
+
+    # Schedule function, called by a timer when it is written to queue its new deadline
+    def schedule(self, tick):
+        self.unqueue(tick)
+        if tick.on:
+            diff = (tick.start + tick.duration - self.now) & self.ticks_max
+            diff = ((diff + self.ticks_halfperiod) & self.ticks_max) - self.ticks_halfperiod
+            self.queue(tick, self.time + diff)
+
+    # Call later function, calls function once after ms, returns a cancellable handle
+    def call_later(self, ms, function):
+        call = Call(self, function, 0)
+        self.queue(call, self.time + ms)
+        return call
+
+    # Call every function, calls function every ms (first call after ms), returns a cancellable handle
+    def call_every(self, ms, function):
+        call = Call(self, function, max(1, ms))
+        self.queue(call, self.time + call.period)
+        return call
+
+    # Queue function, adds a timer or call to the heap at a deadline on the scheduler timeline
+    def queue(self, item, deadline):
+        self.unqueue(item)
+        self.sequence += 1
+        item.sequence = self.sequence
+        _push(self.heap, (deadline, self.sequence, item))
+        # Mostly stale entries ? Rebuild without them
+        if self.stale > 16 and (self.stale << 1) > len(self.heap):
+            self.heap = [entry for entry in self.heap if entry[1] == entry[2].sequence]
+            self.heap.sort()
+            self.stale = 0
+
+    # Unqueue function, leaves any queued entry for a timer or call stale, returns True if one was queued
+    def unqueue(self, item):
+        if item.sequence != 0:
+            item.sequence = 0
+            self.stale += 1
+            return True
+        return False
+
+    # Rebase function, moves the timeline back to 0 and renumbers the queued entries (dropping stale ones)
+    def rebase(self):
+        base = self.time
+        entries = [entry for entry in self.heap if entry[1] == entry[2].sequence]
+        # Sorted entries are a valid heap
+        entries.sort()
+        self.heap = []
+        self.sequence = 0
+        for deadline, sequence, item in entries:
+            self.sequence += 1
+            item.sequence = self.sequence
+            self.heap.append((deadline - base, self.sequence, item))
+        self.stale = 0
+        self.time = 0
+        if self.debug: print(f'Scheduler.rebase() = {base}')
+
+    # Time until next deadline function, returns ms until the next timer or call is due (None if none are)
+    def time_until_next_deadline(self):
+        while len(self.heap) > 0 and self.heap[0][1] != self.heap[0][2].sequence:
+            _pop(self.heap)
+            self.stale -= 1
+        if len(self.heap) == 0:
+            return None
+        elapsed = (self.clock.ticks_ms() - self.now) & self.ticks_max
+        return max(0, self.heap[0][0] - self.time - elapsed)
+
+# Scheduler class (END)
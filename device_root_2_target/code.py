@@ -30,6 +30,9 @@ maintained and there may be no bug maintenance planned for these resources.
 Silicon Labs may update projects from time to time.
 ******************************************************************************
 """
+# Core imports
+import time
+
 # Application imports
 from App import App
 
@@ -38,4 +41,7 @@ app = App(True)
 # Main loop
 while app.on:
     # Call app main function
-    app.main()
\ No newline at end of file
+    idle = app.main()
+    # Sleep until the app next needs to run
+    if idle > 0:
+        time.sleep(idle / 1000)
\ No newline at end of file
@@ -39,11 +39,14 @@ from adafruit_ble.advertising.standard import Advertisement
 from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 
 # Import application modules
+from Audio import Audio, AUDIO_FEEDBACK, AUDIO_ALERT, AUDIO_CONFIRM
 from Button import Button
 from Led import Led
 from Piezo import Piezo
 from Rtttl import Rtttl
+from Scheduler import Scheduler
 from Tick import Tick
+from Tunes import TUNE_KNIGHTRH, TUNE_KNIGHTRL, TUNE_CONFIRM, TUNE_BEEP
 from ImmediateAlertService import ImmediateAlertService
 
 # Constants
@@ -54,16 +57,24 @@ ALERT_LEVEL_HIGH   =    2
 TICK_MS_LEDS       =  100 # Interval for LED timer
 TICK_MS_LOCATE     = 1000 # Interval for locate mode timer
 
+VOLUME_HIGH        =   10 # Piezo volume for high alert tune
+VOLUME_MILD        =    6 # Piezo volume for mild alert tune
+
+IDLE_MS_MAX        =   20 # Longest idle between passes so button presses are not delayed
+
 # Application class - Find Me - Target and simple locator
 class App():
 
     # Initialisation
-    def __init__(self, debug):
+    # clock drives all timers (default: the platform clock), a VirtualClock runs the app in simulated time
+    def __init__(self, debug, clock=None):
         # Note debug setting
         self.debug = True
         if self.debug: print(f'Find Me - target and simple locator')
         # Not initialised
         self.on = False
+        # Scheduler for tick timers
+        self.scheduler = Scheduler(False, clock)
         # Hardware
         self.hw = {}
         if board.board_id == "explorerkit_xg24_brd2703a":
@@ -72,21 +83,21 @@ class App():
             self.hw["btn_mild"]  = Button(board.PB2, True, False) # BTN0
             self.hw["led_high"]  = Led(board.PA7, False, False) # LED1 
             self.hw["led_mild"]  = Led(board.PA4, False, False) # LED0
-            self.hw["rtttl"]     = Rtttl(board.PA0, False) # MIKROE_PWM
+            self.hw["rtttl"]     = Rtttl(board.PA0, False, self.scheduler) # MIKROE_PWM
         elif board.board_id == "devkit_xg24_brd2601b":
             self.on              = True
             self.hw["btn_high"]  = Button(board.PB3, True, False) # BTN1
             self.hw["btn_mild"]  = Button(board.PB2, True, False) # BTN0
             self.hw["led_high"]  = Led(board.PD2, True, False) # RED (PA4=GREEN) 
             self.hw["led_mild"]  = Led(board.PB0, True, False) # BLUE
-            self.hw["rtttl"]    = Rtttl(board.PA7, False) # SPI_CS (header 10 - may clash with IMU) 
+            self.hw["rtttl"]    = Rtttl(board.PA7, False, self.scheduler) # SPI_CS (header 10 - may clash with IMU) 
         elif board.board_id == "sparkfun_thingplus_matter_mgm240p_brd2704a":
             self.on              = True
             self.hw["btn_high"]  = Button(board.PB2, True, False) # (external)
             self.hw["btn_mild"]  = Button(board.PA4, True, False) # (external)
             self.hw["led_high"]  = Led(board.PB0, False, False) # (external)
             self.hw["led_mild"]  = Led(board.PA8, False, False) # BLUE (on board)
-            self.hw["rtttl"]     = Rtttl(board.PC7, False)
+            self.hw["rtttl"]     = Rtttl(board.PC7, False, self.scheduler)
           
         # Couldn't initialise ?
         if not self.on:
@@ -96,16 +107,21 @@ class App():
             if self.debug: print(f'INFO: Initialised board "{board.board_id}"')
             # Tick timers
             self.ticks = {}
-            self.ticks["leds"]   = Tick("leds", TICK_MS_LEDS, True, False)
-            self.ticks["locate"] = Tick("locate", 0, False, False)
+            self.ticks["leds"]   = Tick("leds", TICK_MS_LEDS, True, False, self.scheduler)
+            self.ticks["locate"] = Tick("locate", 0, False, False, self.scheduler)
             # Data
             self.data = {}
             self.data["leds_bit"] = 0b1
             self.data["leds_mask"] = 0b1111111111
             self.data["led_mask_high"] = 0b1
             self.data["led_mask_mild"] = 0b1
-            self.data["tune_name_high"] = self.hw["rtttl"].load("knightrh:d=4,o=6,b=90:16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2c,16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2d#,a4,32a#.4,32a.4,d5,32d#.5,32d.5,2a5,16c.,16d.", False)
-            self.data["tune_name_mild"] = self.hw["rtttl"].load("knightrl:d=4,o=5,b=125:16e,16p,16f,16e,16e,16p,16e,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16e,16p,16f,16e,16e,16p,16f,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d", False)
+            self.data["tune_name_high"] = self.hw["rtttl"].load_compiled(TUNE_KNIGHTRH, False)
+            self.data["tune_name_mild"] = self.hw["rtttl"].load_compiled(TUNE_KNIGHTRL, False)
+            self.data["tune_name_confirm"] = self.hw["rtttl"].load_compiled(TUNE_CONFIRM, False)
+            self.data["tune_name_beep"] = self.hw["rtttl"].load_compiled(TUNE_BEEP, False)
+            self.hw["rtttl"].articulate(90) # Separate repeated notes
+            self.hw["audio"] = Audio(self.hw["rtttl"], False)
+            if self.debug: print(f'INFO: Rtttl tunes {self.hw["rtttl"].tune_bytes} bytes (budget {self.hw["rtttl"].tune_budget})')
             # Bluetooth
             self.ble = {}
             self.ble["connected"] = False
@@ -119,8 +135,12 @@ class App():
             if self.debug: print(f'INFO: BLE short_name="{self.ble["tx_ad"].short_name}"')            
 
     # Main function (called repeatedly do not block)
+    # Returns the ms that can be spent idle before the next call
     def main(self):
 
+        # Assume no idle
+        idle = 0
+
         # App is on ? 
         if self.on:
 
@@ -136,6 +156,8 @@ class App():
                         if self.debug: print(f'INFO: Target mode alert cancelled locally')
                         # Update characteristic
                         self.ble["ias"].alert_level = ALERT_LEVEL_NONE
+                        # Confirm cancellation
+                        self.hw["audio"].request(AUDIO_CONFIRM, self.data["tune_name_confirm"], False)
                     # High button released ?
                     elif self.hw["btn_high"].pressed:
                         if self.debug: print(f'INFO: Locate mode high')
@@ -154,9 +176,8 @@ class App():
                     # Stop locate timer
                     self.ticks["locate"].write(0, False)
 
-            # Read tick timers
-            self.ticks["leds"].read()
-            self.ticks["locate"].read() 
+            # Fire expired tick timers
+            self.scheduler.main()
 
             # Running as target ?
             if self.ble["locate_level"] == ALERT_LEVEL_NONE: 
@@ -192,30 +213,27 @@ class App():
                         # Update LED masks
                         self.data["led_mask_high"] = 0b0101010101
                         self.data["led_mask_mild"] = 0b0
-                        # Update RTTTL
-                        if self.hw["rtttl"].play_name != self.data["tune_name_high"]:
-                            self.hw["rtttl"].play(self.data["tune_name_high"], True)
+                        # Request alert tune
+                        self.hw["audio"].request(AUDIO_ALERT, self.data["tune_name_high"], True, VOLUME_HIGH)
                     # Mild alert ?
                     elif self.ble["alert_level"] == ALERT_LEVEL_MILD:
                         if self.debug: print(f'INFO: Target mode alert mild')
                         # Update LED masks
                         self.data["led_mask_high"] = 0b0
                         self.data["led_mask_mild"] = 0b0101010101
-                        # Update RTTTL
-                        if self.hw["rtttl"].play_name != self.data["tune_name_mild"]:
-                            self.hw["rtttl"].play(self.data["tune_name_mild"], True) 
+                        # Request alert tune
+                        self.hw["audio"].request(AUDIO_ALERT, self.data["tune_name_mild"], True, VOLUME_MILD)
                     # No alert ?                          
                     else:
                         if self.debug: print(f'INFO: Target mode alert none')
                         # Update LED masks
                         self.data["led_mask_high"] = 0b1
                         self.data["led_mask_mild"] = 0b1
-                        # Stop RTTTL                    
-                        if self.hw["rtttl"].play_name != None:
-                            self.hw["rtttl"].stop() 
+                        # Cancel alert tune
+                        self.hw["audio"].cancel(AUDIO_ALERT)
 
-                # Drive rtttl
-                self.hw["rtttl"].main() 
+                # Drive audio
+                self.hw["audio"].main()
 
                 # Led tick timer fired ?
                 if self.ticks["leds"].fired:
@@ -244,11 +262,10 @@ class App():
                     self.ble["radio"].stop_advertising()
                     if self.debug: print(f'INFO: Locate mode stop advertising')
 
-                # Stop RTTTL                    
-                if self.hw["rtttl"].play_name != None:
-                    self.hw["rtttl"].stop()
-                # Drive rtttl
-                self.hw["rtttl"].main()
+                # Cancel alert tune
+                self.hw["audio"].cancel(AUDIO_ALERT)
+                # Drive audio
+                self.hw["audio"].main()
 
                 # Assume we won't locate
                 locate = False
@@ -317,6 +334,8 @@ class App():
                                     if self.debug: print(f'WARNING: Locate mode could not write Alert Level address={address}, level={self.ble["locate_level"]}')
                                 else:
                                     if self.debug: print(f'INFO: Locate mode Alert Level written address={address}, level={self.ble["locate_level"]}')
+                                    # Feedback beep
+                                    self.hw["audio"].request(AUDIO_FEEDBACK, self.data["tune_name_beep"], False)
                             # Disconnect from device
                             connection.disconnect()
                             if self.debug: print(f'INFO: Locate mode disconnect address={address}')
@@ -332,4 +351,14 @@ class App():
                         # Stop locate timer
                         self.ticks["locate"].write(0, False)
 
+            # Idle until the next tick timer is due, polling buttons and BLE at least every IDLE_MS_MAX
+            idle = self.scheduler.time_until_next_deadline()
+            if idle == None or idle > IDLE_MS_MAX:
+                idle = IDLE_MS_MAX
+            # Button changed ? Run again straight away to act on it
+            if self.hw["btn_high"].changed or self.hw["btn_mild"].changed:
+                idle = 0
+
+        return idle
+
 # Application class (END)
\ No newline at end of file
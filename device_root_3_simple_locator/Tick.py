@@ -30,61 +30,102 @@ maintained and there may be no bug maintenance planned for these resources.
 Silicon Labs may update projects from time to time.
 ******************************************************************************
 """
-# Import core modules
-import supervisor
-
-# Constants
-_TICKS_PERIOD = const(1<<29)
-_TICKS_MAX = const(_TICKS_PERIOD-1)
-_TICKS_HALFPERIOD = const(_TICKS_PERIOD//2)
-_TICKS_DURATION_MAX = const(_TICKS_HALFPERIOD-1)
+# Import application modules
+from Clock import default_clock
 
 # Tick class
 class Tick():
 
     # Initialisation
-    def __init__(self, name, duration, repeat, debug):
+    # A scheduler, if given, owns the timer and sets fired once per pass (using the scheduler's clock)
+    # Otherwise clock provides ticks_ms() (default: the platform clock)
+    def __init__(self, name, duration, repeat, debug, scheduler=None, clock=None):
         # Initialise
         self.debug = debug
         if self.debug: print(f'Tick.init({name}, {duration}, {repeat}, {debug})')        
         self.name = name
+        self.scheduler = scheduler
+        if scheduler != None:
+            clock = scheduler.clock
+        elif clock == None:
+            clock = default_clock()
+        self.clock = clock
+        self.ticks_max = clock.period - 1
+        self.ticks_halfperiod = clock.period >> 1
+        self.sequence = 0
         self.on = False
         self.duration = 0
         self.repeat = False
         self.fired = False
         self.start = 0
+        self.late = 0
+        self.late_max = 0
+        self.overruns = 0
         self.write(duration, repeat)
 
     # Write function
     def write(self, duration, repeat):
         self.duration = duration
         self.repeat = repeat
-        if self.duration > _TICKS_DURATION_MAX:
-            self.duration = _TICKS_DURATION_MAX
+        if self.duration >= self.ticks_halfperiod:
+            self.duration = self.ticks_halfperiod - 1
         if self.duration > 0:
             self.on = True
         else:
             self.on = False
-        self.start = supervisor.ticks_ms()
+        if self.scheduler != None:
+            self.start = self.scheduler.now
+            self.scheduler.schedule(self)
+        else:
+            self.start = self.clock.ticks_ms()
         if self.debug: print(f'Tick.write({self.name}, {self.duration}, {self.repeat}) = {self.on}')            
         return self.on
 
+    # Advance function - restarts from the previous deadline rather than now, so successive timings do not drift
+    def advance(self, duration):
+        self.start = (self.start + self.duration) & self.ticks_max
+        self.duration = duration
+        if self.duration >= self.ticks_halfperiod:
+            self.duration = self.ticks_halfperiod - 1
+        if self.duration > 0:
+            self.on = True
+        else:
+            self.on = False
+        if self.scheduler != None:
+            self.scheduler.schedule(self)
+        if self.debug: print(f'Tick.advance({self.name}, {self.duration}) = {self.on}')
+        return self.on
+
     # Read function
     def read(self):
-        self.fired = False
-        if self.on:
-            now = supervisor.ticks_ms()
-            diff = (now - self.start) & _TICKS_MAX
-            diff = ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
-            if diff >= self.duration:
-                self.fired = True
-                if self.repeat:
-                    self.write(self.duration, self.repeat)
-                else:
-                    self.write(0, False)
-        if self.debug and fired: print(f'Tick.read({self.name}) = {self.fired}')
+        # Not scheduled ? Check the clock (scheduled timers are fired by the scheduler)
+        if self.scheduler == None:
+            self.fired = False
+            if self.on:
+                now = self.clock.ticks_ms()
+                diff = (now - self.start) & self.ticks_max
+                diff = ((diff + self.ticks_halfperiod) & self.ticks_max) - self.ticks_halfperiod
+                if diff >= self.duration:
+                    self.expire(diff - self.duration)
+        if self.debug and self.fired: print(f'Tick.read({self.name}) = {self.fired}')
         return self.fired
 
+    # Expire function, fires the timer late ms after its deadline
+    def expire(self, late):
+        self.fired = True
+        self.late = late
+        if late > self.late_max:
+            self.late_max = late
+        # Repeating ? Move on by whole periods so the cadence does not drift, counting missed periods
+        if self.repeat:
+            missed = late // self.duration
+            self.overruns += missed
+            self.start = (self.start + (missed * self.duration)) & self.ticks_max
+            self.advance(self.duration)
+        else:
+            # Stop, leaving the deadline as the start for advance()
+            self.advance(0)
+
 # Tick class (END)
 
 
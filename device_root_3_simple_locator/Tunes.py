@@ -0,0 +1,45 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Generated by tools/rtttl_freeze.py, do not edit
+# Compiled tunes for Rtttl.load_compiled()
+# knightrh:d=4,o=6,b=90:16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2c,16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2d#,a4,32a#.4,32a.4,d5,32d#.5,32d.5,2a5,16c.,16d.
+TUNE_KNIGHTRH = b'RT\x01\x08%\x00knightrhK\x02\xf9\x00n\x02|\x00K\x02|\x00p\x03\xf2\x01\x97\x04\xf9\x00\xdd\x04|\x00\x97\x04|\x00p\x03\xf2\x01K\x02\xf9\x00n\x02|\x00K\x02|\x00p\x03\xf9\x00\x97\x04\xf9\x00\x17\x040\x05K\x02\xf9\x00n\x02|\x00K\x02|\x00p\x03\xf2\x01\x97\x04\xf9\x00\xdd\x04|\x00\x97\x04|\x00p\x03\xf2\x01K\x02\xf9\x00n\x02|\x00K\x02|\x00p\x03\xf9\x00\x97\x04\xf9\x00\xdd\x040\x05\xb8\x01\x98\x02\xd2\x01|\x00\xb8\x01|\x00K\x02\x98\x02n\x02|\x00K\x02|\x00p\x030\x05\x17\x04\xf9\x00\x97\x04\xf9\x00'
+# knightrl:d=4,o=5,b=125:16e,16p,16f,16e,16e,16p,16e,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16e,16p,16f,16e,16e,16p,16f,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d
+TUNE_KNIGHTRL = b'RT\x01\x08@\x00knightrl\x93\x02x\x00\x00\x00x\x00\xba\x02x\x00\x93\x02x\x00\x93\x02x\x00\x00\x00x\x00\x93\x02x\x00\x93\x02x\x00\xba\x02x\x00\x93\x02x\x00\x93\x02x\x00\x93\x02x\x00n\x02x\x00\x93\x02x\x00\x93\x02x\x00\x93\x02x\x00\x93\x02x\x00\x00\x00x\x00\xba\x02x\x00\x93\x02x\x00\x93\x02x\x00\x00\x00x\x00\xba\x02x\x00\x93\x02x\x00\xba\x02x\x00\x93\x02x\x00\x93\x02x\x00\x93\x02x\x00n\x02x\x00\x93\x02x\x00\x93\x02x\x00\x93\x02x\x00K\x02x\x00\x00\x00x\x00\x93\x02x\x00K\x02x\x00K\x02x\x00\x00\x00x\x00\x93\x02x\x00K\x02x\x00\x93\x02x\x00K\x02x\x00K\x02x\x00K\x02x\x00\x0b\x02x\x00K\x02x\x00K\x02x\x00K\x02x\x00K\x02x\x00\x00\x00x\x00\x93\x02x\x00K\x02x\x00K\x02x\x00\x00\x00x\x00\x93\x02x\x00K\x02x\x00\x93\x02x\x00K\x02x\x00K\x02x\x00K\x02x\x00\x0b\x02x\x00K\x02x\x00K\x02x\x00K\x02x\x00'
+# confirm:d=4,o=6,b=900:c,e,g
+TUNE_CONFIRM = b"RT\x01\x07\x03\x00confirm\x17\x04@\x00'\x05@\x00 \x06@\x00"
+# beep:d=4,o=7,b=600:c
+TUNE_BEEP = b'RT\x01\x04\x01\x00beep-\x08`\x00'
+
+# All tunes
+TUNES = (TUNE_KNIGHTRH, TUNE_KNIGHTRL, TUNE_CONFIRM, TUNE_BEEP)
@@ -39,34 +39,47 @@ from adafruit_ble.advertising.standard import Advertisement
 from adafruit_ble.advertising.standard import ProvideServicesAdvertisement
 
 # Import application modules
+from Audio import Audio, AUDIO_FEEDBACK, AUDIO_ALERT, AUDIO_CONFIRM
 from Button import Button
 from Led import Led
 from Piezo import Piezo
 from Rtttl import Rtttl
-from Tick import Tick
+from Scheduler import Scheduler
+from Tunes import TUNE_KNIGHTRH, TUNE_KNIGHTRL, TUNE_CONFIRM, TUNE_BEEP
 from ImmediateAlertService import ImmediateAlertService
 
 # Constants
 ALERT_LEVEL_NONE   =    0
 ALERT_LEVEL_MILD   =    1
 ALERT_LEVEL_HIGH   =    2
-ALERT_LEVEL_CANCEL =    3
+
+STATE_TARGET       =    0 # Target, advertising and sounding alerts set by locators
+STATE_LOCATE       =    1 # Locator, setting alerts in found targets
+STATE_CANCEL       =    2 # Locator, cancelling alerts it set in targets
 
 TICK_MS_LEDS       =  100 # Interval for LED timer
 TICK_MS_LOCATE     = 1000 # Interval for locate mode timer
 
+VOLUME_HIGH        =   10 # Piezo volume for high alert tune
+VOLUME_MILD        =    6 # Piezo volume for mild alert tune
+
+IDLE_MS_MAX        =   20 # Longest idle between passes so button presses are not delayed
+
 LOCATE_COUNT_MAX   =    3 # Number of attempts to set or clear alert level in target devices
 
 # Application class - Find Me - Target and advanced locator
 class App():
 
     # Initialisation
-    def __init__(self, debug):
+    # clock drives all timers (default: the platform clock), a VirtualClock runs the app in simulated time
+    def __init__(self, debug, clock=None):
         # Note debug setting
         self.debug = True
         if self.debug: print(f'Find Me - target and advanced locator')
         # Not initialised
         self.on = False
+        # Scheduler for tick timers
+        self.scheduler = Scheduler(False, clock)
         # Hardware
         self.hw = {}
         if board.board_id == "explorerkit_xg24_brd2703a":
@@ -75,21 +88,21 @@ class App():
             self.hw["btn_mild"]  = Button(board.PB2, True, False) # BTN0
             self.hw["led_high"]  = Led(board.PA7, False, False) # LED1 
             self.hw["led_mild"]  = Led(board.PA4, False, False) # LED0
-            self.hw["rtttl"]     = Rtttl(board.PA0, False) # MIKROE_PWM
+            self.hw["rtttl"]     = Rtttl(board.PA0, False, self.scheduler) # MIKROE_PWM
         elif board.board_id == "devkit_xg24_brd2601b":
             self.on              = True
             self.hw["btn_high"]  = Button(board.PB3, True, False) # BTN1
             self.hw["btn_mild"]  = Button(board.PB2, True, False) # BTN0
             self.hw["led_high"]  = Led(board.PD2, True, False) # RED (PA4=GREEN) 
             self.hw["led_mild"]  = Led(board.PB0, True, False) # BLUE
-            self.hw["rtttl"]    = Rtttl(board.PA7, False) # SPI_CS (header 10 - may clash with IMU) 
+            self.hw["rtttl"]    = Rtttl(board.PA7, False, self.scheduler) # SPI_CS (header 10 - may clash with IMU) 
         elif board.board_id == "sparkfun_thingplus_matter_mgm240p_brd2704a":
             self.on              = True
             self.hw["btn_high"]  = Button(board.PB2, True, False) # (external)
             self.hw["btn_mild"]  = Button(board.PA4, True, False) # (external)
             self.hw["led_high"]  = Led(board.PB0, False, False) # (external)
             self.hw["led_mild"]  = Led(board.PA8, False, False) # BLUE (on board)
-            self.hw["rtttl"]     = Rtttl(board.PC7, False)
+            self.hw["rtttl"]     = Rtttl(board.PC7, False, self.scheduler)
           
         # Couldn't initialise ?
         if not self.on:
@@ -97,18 +110,21 @@ class App():
         # Initialised ?
         else:
             if self.debug: print(f'INFO: Initialised board "{board.board_id}"')
-            # Tick timers
-            self.ticks = {}
-            self.ticks["leds"]   = Tick("leds", TICK_MS_LEDS, True, False)
-            self.ticks["locate"] = Tick("locate", 0, False, False)
+            # Scheduled calls, started and cancelled by the state entry and exit actions
+            self.calls = {}
             # Data
             self.data = {}
             self.data["leds_bit"] = 0b1
             self.data["leds_mask"] = 0b1111111111
             self.data["led_mask_high"] = 0b1
             self.data["led_mask_mild"] = 0b1
-            self.data["tune_name_high"] = self.hw["rtttl"].load("knightrh:d=4,o=6,b=90:16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2c,16d.5,32d#.5,32d.5,8a.5,16d.,32d#.,32d.,8a.5,16d.5,32d#.5,32d.5,16a.5,16d.,2d#,a4,32a#.4,32a.4,d5,32d#.5,32d.5,2a5,16c.,16d.", False)
-            self.data["tune_name_mild"] = self.hw["rtttl"].load("knightrl:d=4,o=5,b=125:16e,16p,16f,16e,16e,16p,16e,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16e,16p,16f,16e,16e,16p,16f,16e,16f,16e,16e,16e,16d#,16e,16e,16e,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d,16d,16p,16e,16d,16d,16p,16e,16d,16e,16d,16d,16d,16c,16d,16d,16d", False)
+            self.data["tune_name_high"] = self.hw["rtttl"].load_compiled(TUNE_KNIGHTRH, False)
+            self.data["tune_name_mild"] = self.hw["rtttl"].load_compiled(TUNE_KNIGHTRL, False)
+            self.data["tune_name_confirm"] = self.hw["rtttl"].load_compiled(TUNE_CONFIRM, False)
+            self.data["tune_name_beep"] = self.hw["rtttl"].load_compiled(TUNE_BEEP, False)
+            self.hw["rtttl"].articulate(90) # Separate repeated notes
+            self.hw["audio"] = Audio(self.hw["rtttl"], False)
+            if self.debug: print(f'INFO: Rtttl tunes {self.hw["rtttl"].tune_bytes} bytes (budget {self.hw["rtttl"].tune_budget})')
             # Bluetooth
             self.ble = {}
             self.ble["connected"] = False
@@ -122,284 +138,301 @@ class App():
             self.ble["locate_counts"] = {}
             self.ble["locate_cancel"] = 0
             if self.debug: print(f'INFO: BLE short_name="{self.ble["tx_ad"].short_name}"')            
+            # States, each with entry and exit actions, a button handler and the handlers run every pass
+            self.states = {}
+            self.states[STATE_TARGET] = {"enter": self.target_enter, "exit": self.target_exit, "button": self.target_button, "main": (self.target_radio, self.target_alert, self.hw["audio"].main)}
+            self.states[STATE_LOCATE] = {"enter": self.locate_enter, "exit": self.locate_exit, "button": self.locate_button, "main": (self.hw["audio"].main,)}
+            self.states[STATE_CANCEL] = {"enter": self.cancel_enter, "exit": self.cancel_exit, "button": self.cancel_button, "main": (self.hw["audio"].main,)}
+            self.state = None
+            self.state_button = None
+            self.state_main = ()
+            self.state_goto(STATE_TARGET)
 
     # Main function (called repeatedly do not block)
+    # Returns the ms that can be spent idle before the next call
     def main(self):
 
+        # Assume no idle
+        idle = 0
+
         # App is on ? 
         if self.on:
 
+            # Fire expired tick timers and calls
+            self.scheduler.main()
+
             # Read buttons
             self.hw["btn_high"].read()
             self.hw["btn_mild"].read()
             # Has a button been released ? 
             if self.hw["btn_high"].pressed or self.hw["btn_mild"].pressed:
-                # Running as target ?
-                if self.ble["locate_level"] == ALERT_LEVEL_NONE:
-                    # Sounding alert ?
-                    if self.ble["ias"].alert_level != ALERT_LEVEL_NONE:
-                        if self.debug: print(f'INFO: Target mode alert cancelled locally')
-                        # Update characteristic
-                        self.ble["ias"].alert_level = ALERT_LEVEL_NONE
-                    # High button released ?
-                    elif self.hw["btn_high"].pressed:
-                        if self.debug: print(f'INFO: Locate mode high')
-                        # Go to locate level high
-                        self.ble["locate_level"] = ALERT_LEVEL_HIGH
-                        # Clear locate counts
-                        self.ble["locate_counts"] = {} 
-                        # Clear cancel attempt count
-                        self.ble["locate_cancel"] = 0                                               
-                    # Mild button released ?
-                    elif self.hw["btn_mild"].pressed:
-                        if self.debug: print(f'INFO: Locate mode mild')
-                        # Go to locate level mild
-                        self.ble["locate_level"] = ALERT_LEVEL_MILD 
-                        # Clear locate counts
-                        self.ble["locate_counts"] = {}
-                        # Clear cancel attempt count
-                        self.ble["locate_cancel"] = 0
-                # Running as locator ? 
-                else:
-                    if self.debug: print(f'INFO: Locate mode cancelling')
-                    # Go to locate level cancel
-                    self.ble["locate_level"] = ALERT_LEVEL_CANCEL
-                    # Make three attempts to cancel on each target we activated
-                    self.ble["locate_cancel"] = LOCATE_COUNT_MAX
-
-            # Read tick timers
-            self.ticks["leds"].read()
-            self.ticks["locate"].read() 
-
-            # Running as target ?
-            if self.ble["locate_level"] == ALERT_LEVEL_NONE: 
-
-                # Connected changed ?
-                if self.ble["connected"] != self.ble["radio"].connected:
-                    self.ble["connected"] = self.ble["radio"].connected
-                    if self.debug:
-                        if self.ble["connected"]: print(f'INFO: Target mode connected')
-                        else: print(f'INFO: Target mode disconnected')
-
-                # Not connected ?
-                if not self.ble["radio"].connected:
-                    # Not advertising ?
-                    if not self.ble["radio"].advertising:
-                        # Begin advertising
-                        self.ble["radio"].start_advertising(self.ble["tx_ad"])
-                        if self.debug: print(f'INFO: Target mode start advertising')
-                # Connected ?
-                else:
-                    # Advertising ?
-                    if self.ble["radio"].advertising:
-                        # Stop advertising
-                        self.ble["radio"].stop_advertising()
-                        if self.debug: print(f'INFO: Target mode stop advertising')
-
-                # Alert level changed ?
-                if self.ble["alert_level"] != self.ble["ias"].alert_level:
-                    self.ble["alert_level"] = self.ble["ias"].alert_level
-                    # High alert ?
-                    if self.ble["alert_level"] == ALERT_LEVEL_HIGH:
-                        if self.debug: print(f'INFO: Target mode alert high')
-                        # Update LED masks
-                        self.data["led_mask_high"] = 0b0101010101
-                        self.data["led_mask_mild"] = 0b0
-                        # Update RTTTL
-                        if self.hw["rtttl"].play_name != self.data["tune_name_high"]:
-                            self.hw["rtttl"].play(self.data["tune_name_high"], True)
-                    # Mild alert ?
-                    elif self.ble["alert_level"] == ALERT_LEVEL_MILD:
-                        if self.debug: print(f'INFO: Target mode alert mild')
-                        # Update LED masks
-                        self.data["led_mask_high"] = 0b0
-                        self.data["led_mask_mild"] = 0b0101010101
-                        # Update RTTTL
-                        if self.hw["rtttl"].play_name != self.data["tune_name_mild"]:
-                            self.hw["rtttl"].play(self.data["tune_name_mild"], True) 
-                    # No alert ?                          
-                    else:
-                        if self.debug: print(f'INFO: Target mode alert none')
-                        # Update LED masks
-                        self.data["led_mask_high"] = 0b1
-                        self.data["led_mask_mild"] = 0b1
-                        # Stop RTTTL                    
-                        if self.hw["rtttl"].play_name != None:
-                            self.hw["rtttl"].stop() 
-
-                # Drive rtttl
-                self.hw["rtttl"].main() 
-
-                # Led tick timer fired ?
-                if self.ticks["leds"].fired:
-                    # Safety check leds bit
-                    if self.data["leds_bit"] & self.data["leds_mask"] == 0b0:
-                        self.data["leds_bit"] = 0b1 
-                    # Update led high
-                    if self.data["leds_bit"] & self.data["led_mask_high"]:
-                        self.hw["led_high"].write(True)
-                    else:
-                        self.hw["led_high"].write(False)
-                    # Update led mild
-                    if self.data["leds_bit"] & self.data["led_mask_mild"]:
-                        self.hw["led_mild"].write(True)
-                    else:
-                        self.hw["led_mild"].write(False)                    
-                    # Update leds bit
-                    self.data["leds_bit"] <<= 1
-              
-            # Running as locator ?    
+                self.state_button()
+
+            # Run the handlers for the current state
+            for handler in self.state_main:
+                handler()
+
+            # Idle until the next tick timer or call is due, polling buttons and BLE at least every IDLE_MS_MAX
+            idle = self.scheduler.time_until_next_deadline()
+            if idle == None or idle > IDLE_MS_MAX:
+                idle = IDLE_MS_MAX
+            # Button changed ? Run again straight away to act on it
+            if self.hw["btn_high"].changed or self.hw["btn_mild"].changed:
+                idle = 0
+
+        return idle
+
+    # State goto function, runs the exit action of the current state then the entry action of the new state
+    def state_goto(self, state):
+        if self.state != None and self.states[self.state]["exit"] != None:
+            self.states[self.state]["exit"]()
+        self.state = state
+        self.state_button = self.states[state]["button"]
+        self.state_main = self.states[state]["main"]
+        if self.states[state]["enter"] != None:
+            self.states[state]["enter"]()
+
+    # Target enter function
+    def target_enter(self):
+        if self.debug: print(f'INFO: Target mode')
+        # Start flashing LEDs
+        self.calls["leds"] = self.scheduler.call_every(TICK_MS_LEDS, self.target_leds)
+
+    # Target exit function
+    def target_exit(self):
+        # Stop flashing LEDs
+        self.calls["leds"].cancel()
+
+    # Target button function, cancels a sounding alert or starts locating
+    def target_button(self):
+        # Sounding alert ?
+        if self.ble["ias"].alert_level != ALERT_LEVEL_NONE:
+            if self.debug: print(f'INFO: Target mode alert cancelled locally')
+            # Update characteristic
+            self.ble["ias"].alert_level = ALERT_LEVEL_NONE
+            # Confirm cancellation
+            self.hw["audio"].request(AUDIO_CONFIRM, self.data["tune_name_confirm"], False)
+        # High button released ?
+        elif self.hw["btn_high"].pressed:
+            if self.debug: print(f'INFO: Locate mode high')
+            # Go to locate level high
+            self.ble["locate_level"] = ALERT_LEVEL_HIGH
+            self.state_goto(STATE_LOCATE)
+        # Mild button released ?
+        elif self.hw["btn_mild"].pressed:
+            if self.debug: print(f'INFO: Locate mode mild')
+            # Go to locate level mild
+            self.ble["locate_level"] = ALERT_LEVEL_MILD
+            self.state_goto(STATE_LOCATE)
+
+    # Target radio function, advertises while not connected
+    def target_radio(self):
+        radio = self.ble["radio"]
+        connected = radio.connected
+        # Connected changed ?
+        if self.ble["connected"] != connected:
+            self.ble["connected"] = connected
+            if self.debug:
+                if connected: print(f'INFO: Target mode connected')
+                else: print(f'INFO: Target mode disconnected')
+        # Not connected ?
+        if not connected:
+            # Not advertising ?
+            if not radio.advertising:
+                # Begin advertising
+                radio.start_advertising(self.ble["tx_ad"])
+                if self.debug: print(f'INFO: Target mode start advertising')
+        # Connected ?
+        else:
+            # Advertising ?
+            if radio.advertising:
+                # Stop advertising
+                radio.stop_advertising()
+                if self.debug: print(f'INFO: Target mode stop advertising')
+
+    # Target alert function, sounds the alert level written by a locator
+    def target_alert(self):
+        alert_level = self.ble["ias"].alert_level
+        # Alert level changed ?
+        if self.ble["alert_level"] != alert_level:
+            self.ble["alert_level"] = alert_level
+            # High alert ?
+            if alert_level == ALERT_LEVEL_HIGH:
+                if self.debug: print(f'INFO: Target mode alert high')
+                # Update LED masks
+                self.data["led_mask_high"] = 0b0101010101
+                self.data["led_mask_mild"] = 0b0
+                # Request alert tune
+                self.hw["audio"].request(AUDIO_ALERT, self.data["tune_name_high"], True, VOLUME_HIGH)
+            # Mild alert ?
+            elif alert_level == ALERT_LEVEL_MILD:
+                if self.debug: print(f'INFO: Target mode alert mild')
+                # Update LED masks
+                self.data["led_mask_high"] = 0b0
+                self.data["led_mask_mild"] = 0b0101010101
+                # Request alert tune
+                self.hw["audio"].request(AUDIO_ALERT, self.data["tune_name_mild"], True, VOLUME_MILD)
+            # No alert ?                          
             else:
-
-                # Advertising ?
-                if self.ble["radio"].advertising:
-                    # Stop advertising
-                    self.ble["radio"].stop_advertising()
-                    if self.debug: print(f'INFO: Locate mode stop advertising')
-
-                # Stop RTTTL                    
-                if self.hw["rtttl"].play_name != None:
-                    self.hw["rtttl"].stop()
-                # Drive rtttl
-                self.hw["rtttl"].main()
-
-                # Assume we won't locate
-                locate = False
-                # Locate timer not running ?
-                if not self.ticks["locate"].on:
-                    # Start repeating locate timer
-                    self.ticks["locate"].write(TICK_MS_LOCATE, True)
-                    # Locate
-                    locate = True                    
-                # Locate timer fired ?
-                elif self.ticks["locate"].fired:
-                    # Locate
-                    locate = True
-
-                # Time to locate ?
-                if locate:
-
-                    # Locating ?
-                    if self.ble["locate_level"] == ALERT_LEVEL_MILD or self.ble["locate_level"] == ALERT_LEVEL_HIGH:
-
-                        # Turn off LEDs during scan
-                        self.hw["led_high"].write(False)
-                        self.hw["led_mild"].write(False)
-
-                        # Start scan
-                        for ad in self.ble["radio"].start_scan(ProvideServicesAdvertisement, timeout=0.1):
-                            # Immediate alert service in advertisement ?
-                            if self.ble["ias"] in ad.services:
-                                # Has a short name ?
-                                if ad.short_name != None:
-                                    # Shortname contains Find Me ?
-                                    if ad.short_name.find("Find Me") > -1:
-                                        # Not got this device yet ?
-                                        if not ad.address in self.ble["locate_counts"]:
-                                            if self.debug: print(f'INFO: Locate mode found target address={ad.address}, short_name="{ad.short_name}"')
-                                            # Initialise locate count for this address
-                                            self.ble["locate_counts"][ad.address] = 0
-                        # Stop scan
-                        self.ble["radio"].stop_scan()
-
-                        # Alert level high ?        
-                        if self.ble["locate_level"] == ALERT_LEVEL_HIGH:
-                            # Turn on high LED
-                            self.hw["led_high"].write(True)
-                        # Alert level mild ?
-                        else:
-                            # Turn on high LED
-                            self.hw["led_mild"].write(True)
-
-                        # Loop through devices to be located
-                        for address in self.ble["locate_counts"].keys():
-                            # Need to transmit write to this device
-                            if self.ble["locate_counts"][address] < LOCATE_COUNT_MAX:
-                                # Attempt to connect to device
-                                connection = self.ble["radio"].connect(address, timeout=0.1)
-                                if self.debug: print(f'INFO: Locate mode connect address={address}, connected={connection.connected}')
-                                # Attempt to get service
-                                try:
-                                    service = connection[ImmediateAlertService]
-                                except:
-                                    if self.debug: print(f'WARNING: Locate mode could not find Immediate Alert Service address={address}')
-                                else:
-                                    # Attempt to write alert level
-                                    try: 
-                                        service.alert_level = self.ble["locate_level"]
-                                    except:
-                                        if self.debug: print(f'WARNING: Locate mode could not write Alert Level address={address}, level={self.ble["locate_level"]}')
-                                    else:
-                                        # Increment count
-                                        self.ble["locate_counts"][address] += 1
-                                        if self.debug: print(f'INFO: Locate mode Alert Level written address={address}, count={self.ble["locate_counts"][address]}, level={self.ble["locate_level"]}')
-                                # Disconnect from device
-                                connection.disconnect()
-                                if self.debug: print(f'INFO: Locate mode disconnect address={address}')
-                                # Wait for disconnection
-                                while connection.connected:
-                                    pass
-
-                    # Cancelling locating ?
-                    elif self.ble["locate_level"] == ALERT_LEVEL_CANCEL:
-
-                        # Turn on LEDs during cancellation attempt
-                        self.hw["led_high"].write(True)
-                        self.hw["led_mild"].write(True)
-
-                        # Still need to make cancel attempts ?
-                        if self.ble["locate_cancel"] > 0:
-                            # Loop through devices we previously located
-                            for address in self.ble["locate_counts"].keys():
-                                # Need to transmit write to this device
-                                if self.ble["locate_counts"][address] > 0:
-                                    # Attempt to connect to device
-                                    connection = self.ble["radio"].connect(address, timeout=0.1)
-                                    if self.debug: print(f'INFO: Locate mode connect address={address}, connected={connection.connected}')
-                                    # Attempt to get service
-                                    try:
-                                        service = connection[ImmediateAlertService]
-                                    except:
-                                        if self.debug: print(f'WARNING: Locate mode could not find Immediate Alert Service address={address}')
-                                    else:
-                                        # Attempt to cancel alert level
-                                        try: 
-                                            service.alert_level = ALERT_LEVEL_NONE
-                                        except:
-                                            if self.debug: print(f'WARNING: Locate mode could not write Alert Level address={address}, level={self.ble["locate_level"]}')
-                                        else:
-                                            if self.debug: print(f'INFO: Locate mode Alert Level written address={address}, count={self.ble["locate_cancel"]}, level=0')
-                                    # Disconnect from device
-                                    connection.disconnect()
-                                    if self.debug: print(f'INFO: Locate mode disconnect address={address}")')
-                                    # Wait for disconnection
-                                    while connection.connected:
-                                        pass
-                            # Decrement cancel counter
-                            self.ble["locate_cancel"] -= 1
-                            
-                        # Exhausted cancellation attempts ?
-                        if self.ble["locate_cancel"] <= 0:
-                            if self.debug: print(f'INFO: Target mode')
-                            # Go to locate level none
-                            self.ble["locate_level"] = ALERT_LEVEL_NONE 
-                            # Clear locate counts
-                            self.ble["locate_counts"] = {}
-                            # Clear cancel attempt count
-                            self.ble["locate_cancel"] = 0
-                            # Stop locate timer
-                            self.ticks["locate"].write(0, False)
-
-                    # Something went wrong ?
-                    else:
-                        if self.debug: print(f'INFO: Target mode')
-                        # Go to locate level none
-                        self.ble["locate_level"] = ALERT_LEVEL_NONE 
-                        # Clear locate counts
-                        self.ble["locate_counts"] = {}
-                        # Clear cancel attempt count
-                        self.ble["locate_cancel"] = 0
-                        # Stop locate timer
-                        self.ticks["locate"].write(0, False)
+                if self.debug: print(f'INFO: Target mode alert none')
+                # Update LED masks
+                self.data["led_mask_high"] = 0b1
+                self.data["led_mask_mild"] = 0b1
+                # Cancel alert tune
+                self.hw["audio"].cancel(AUDIO_ALERT)
+
+    # Target leds function (called every TICK_MS_LEDS), flashes the LEDs from their masks
+    def target_leds(self):
+        data = self.data
+        # Safety check leds bit
+        if data["leds_bit"] & data["leds_mask"] == 0b0:
+            data["leds_bit"] = 0b1 
+        # Update led high
+        if data["leds_bit"] & data["led_mask_high"]:
+            self.hw["led_high"].write(True)
+        else:
+            self.hw["led_high"].write(False)
+        # Update led mild
+        if data["leds_bit"] & data["led_mask_mild"]:
+            self.hw["led_mild"].write(True)
+        else:
+            self.hw["led_mild"].write(False)
+        # Update leds bit
+        data["leds_bit"] <<= 1
+
+    # Locate enter function
+    def locate_enter(self):
+        # Advertising ?
+        if self.ble["radio"].advertising:
+            # Stop advertising
+            self.ble["radio"].stop_advertising()
+            if self.debug: print(f'INFO: Locate mode stop advertising')
+        # Cancel alert tune
+        self.hw["audio"].cancel(AUDIO_ALERT)
+        # Clear locate counts
+        self.ble["locate_counts"] = {}
+        # Clear cancel attempt count
+        self.ble["locate_cancel"] = 0
+        # Locate straight away then every TICK_MS_LOCATE
+        self.locate()
+        self.calls["locate"] = self.scheduler.call_every(TICK_MS_LOCATE, self.locate)
+
+    # Locate exit function
+    def locate_exit(self):
+        # Stop locating
+        self.calls["locate"].cancel()
+
+    # Locate button function
+    def locate_button(self):
+        self.state_goto(STATE_CANCEL)
+
+    # Locate function, scans for targets then writes the locate level to each one that needs it
+    def locate(self):
+        radio = self.ble["radio"]
+        locate_counts = self.ble["locate_counts"]
+        # Turn off LEDs during scan
+        self.hw["led_high"].write(False)
+        self.hw["led_mild"].write(False)
+        # Start scan
+        for ad in radio.start_scan(ProvideServicesAdvertisement, timeout=0.1):
+            # Immediate alert service in advertisement ?
+            if self.ble["ias"] in ad.services:
+                # Has a short name ?
+                if ad.short_name != None:
+                    # Shortname contains Find Me ?
+                    if ad.short_name.find("Find Me") > -1:
+                        # Not got this device yet ?
+                        if not ad.address in locate_counts:
+                            if self.debug: print(f'INFO: Locate mode found target address={ad.address}, short_name="{ad.short_name}"')
+                            # Initialise locate count for this address
+                            locate_counts[ad.address] = 0
+        # Stop scan
+        radio.stop_scan()
+        # Alert level high ?        
+        if self.ble["locate_level"] == ALERT_LEVEL_HIGH:
+            # Turn on high LED
+            self.hw["led_high"].write(True)
+        # Alert level mild ?
+        else:
+            # Turn on mild LED
+            self.hw["led_mild"].write(True)
+        # Loop through devices to be located
+        for address in locate_counts.keys():
+            # Need to transmit write to this device ?
+            if locate_counts[address] < LOCATE_COUNT_MAX:
+                # Written ?
+                if self.alert_write(address, self.ble["locate_level"]):
+                    # Increment count
+                    locate_counts[address] += 1
+                    if self.debug: print(f'INFO: Locate mode Alert Level written address={address}, count={locate_counts[address]}, level={self.ble["locate_level"]}')
+                    # Feedback beep
+                    self.hw["audio"].request(AUDIO_FEEDBACK, self.data["tune_name_beep"], False)
+
+    # Cancel enter function
+    def cancel_enter(self):
+        # Turn on LEDs during cancellation attempts
+        self.hw["led_high"].write(True)
+        self.hw["led_mild"].write(True)
+        # Make three attempts to cancel on each target we activated, every TICK_MS_LOCATE
+        self.cancel_button()
+        self.calls["cancel"] = self.scheduler.call_every(TICK_MS_LOCATE, self.cancel)
+
+    # Cancel exit function
+    def cancel_exit(self):
+        # Stop cancelling
+        self.calls["cancel"].cancel()
+        # Go to locate level none
+        self.ble["locate_level"] = ALERT_LEVEL_NONE
+        # Clear locate counts
+        self.ble["locate_counts"] = {}
+        # Clear cancel attempt count
+        self.ble["locate_cancel"] = 0
+
+    # Cancel button function, restarts the cancel attempts
+    def cancel_button(self):
+        if self.debug: print(f'INFO: Locate mode cancelling')
+        self.ble["locate_cancel"] = LOCATE_COUNT_MAX
+
+    # Cancel function, writes no alert to each target we activated, returns to target mode once the attempts are exhausted
+    def cancel(self):
+        # Loop through devices we previously located
+        for address in self.ble["locate_counts"].keys():
+            # Need to transmit write to this device ?
+            if self.ble["locate_counts"][address] > 0:
+                # Written ?
+                if self.alert_write(address, ALERT_LEVEL_NONE):
+                    if self.debug: print(f'INFO: Locate mode Alert Level written address={address}, count={self.ble["locate_cancel"]}, level=0')
+        # Decrement cancel counter
+        self.ble["locate_cancel"] -= 1
+        # Exhausted cancellation attempts ?
+        if self.ble["locate_cancel"] <= 0:
+            self.state_goto(STATE_TARGET)
+
+    # Alert write function, connects to a target to write its alert level, returns True if written
+    def alert_write(self, address, level):
+        written = False
+        # Attempt to connect to device
+        connection = self.ble["radio"].connect(address, timeout=0.1)
+        if self.debug: print(f'INFO: Locate mode connect address={address}, connected={connection.connected}')
+        # Attempt to get service
+        try:
+            service = connection[ImmediateAlertService]
+        except:
+            if self.debug: print(f'WARNING: Locate mode could not find Immediate Alert Service address={address}')
+        else:
+            # Attempt to write alert level
+            try: 
+                service.alert_level = level
+            except:
+                if self.debug: print(f'WARNING: Locate mode could not write Alert Level address={address}, level={level}')
+            else:
+                written = True
+        # Disconnect from device
+        connection.disconnect()
+        if self.debug: print(f'INFO: Locate mode disconnect address={address}')
+        # Wait for disconnection
+        while connection.connected:
+            pass
+        return written
 
 # Application class (END)
\ No newline at end of file
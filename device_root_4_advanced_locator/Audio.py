@@ -0,0 +1,128 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import application modules
+from Piezo import VOLUME_MAX
+
+# Request priorities, higher priorities preempt lower ones which resume when they finish
+AUDIO_FEEDBACK = const(0) # Locator feedback beeps
+AUDIO_ALERT = const(1) # Looping alert tunes
+AUDIO_CONFIRM = const(2) # One shot confirmations
+AUDIO_PRIORITIES = const(3)
+
+# Audio class - arbitrates prioritised tune requests over an Rtttl player
+class Audio():
+
+    # Initialisation
+    def __init__(self, rtttl, debug):
+        # Initialise
+        self.debug = debug
+        if self.debug: print(f'Audio.init({debug})')
+        self.rtttl = rtttl
+        # One request per priority [tune_name, repeat, volume, resume index]
+        self.requests = [None] * AUDIO_PRIORITIES
+        self.active = None
+
+    # Main function - call repeatedly to drive playback
+    def main(self):
+        self.rtttl.main()
+        # Active request finished (one shot) ? Drop it and resume the next
+        if self.active != None and self.rtttl.play_name == None:
+            for priority in range(AUDIO_PRIORITIES):
+                if self.requests[priority] is self.active:
+                    self.requests[priority] = None
+            self.active = None
+            self.arbitrate()
+
+    # Request function, sets the tune at a priority (a matching request is left playing)
+    def request(self, priority, tune_name, repeat, volume=VOLUME_MAX):
+        result = False
+        current = self.requests[priority]
+        if current == None or current[0] != tune_name or current[1] != repeat or current[2] != volume:
+            self.requests[priority] = [tune_name, repeat, volume, 0]
+            self.arbitrate()
+            result = True
+        if self.debug: print(f'Audio.request({priority}, "{tune_name}", {repeat}, {volume}) = {result}')
+        return result
+
+    # Cancel function, removes the request at a priority
+    def cancel(self, priority):
+        result = False
+        if self.requests[priority] != None:
+            self.requests[priority] = None
+            self.arbitrate()
+            result = True
+        if self.debug: print(f'Audio.cancel({priority}) = {result}')
+        return result
+
+    # Requested function, returns the tune name requested at a priority
+    def requested(self, priority):
+        if self.requests[priority] != None:
+            return self.requests[priority][0]
+        return None
+
+    # Arbitrate function, plays the highest priority request
+    def arbitrate(self):
+        top = None
+        for request in self.requests:
+            if request != None:
+                top = request
+        # Highest request already playing ?
+        if top is self.active:
+            return
+        # Preempting a request that is still wanted ? Remember where it was to resume it later
+        if self.active != None:
+            for request in self.requests:
+                if request is self.active:
+                    request[3] = max(0, self.rtttl.play_index - 1)
+        previous = self.active
+        self.active = None
+        # Play the highest request, dropping any that cannot be played
+        for priority in range(AUDIO_PRIORITIES - 1, -1, -1):
+            request = self.requests[priority]
+            if request != None:
+                # Still playing ? Leave it
+                if request is previous:
+                    self.active = request
+                    break
+                if self.rtttl.play(request[0], request[1], volume=request[2]):
+                    if request[3] > 0:
+                        self.rtttl.seek(request[3])
+                    self.active = request
+                    break
+                self.requests[priority] = None
+        # Nothing playable ?
+        if self.active == None:
+            self.rtttl.stop()
+        if self.debug: print(f'Audio.arbitrate() = {self.active}')
+
+# Audio class (END)
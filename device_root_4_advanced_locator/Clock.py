@@ -0,0 +1,93 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import time
+try:
+    import supervisor
+except ImportError:
+    supervisor = None
+
+# Period of supervisor.ticks_ms(), which wraps every 2^29 ms (about 6.2 days)
+TICKS_PERIOD = const(1<<29)
+
+# TicksClock class - CircuitPython supervisor.ticks_ms()
+class TicksClock():
+
+    # Initialisation
+    def __init__(self):
+        self.period = TICKS_PERIOD
+
+    # Ticks function, returns the time in ms wrapped to the period
+    def ticks_ms(self):
+        return supervisor.ticks_ms()
+
+# MonotonicClock class - time.monotonic_ns() for hosts without supervisor, wrapped to a power of 2 period
+class MonotonicClock():
+
+    # Initialisation
+    def __init__(self, period=TICKS_PERIOD):
+        self.period = period
+
+    # Ticks function, returns the time in ms wrapped to the period
+    def ticks_ms(self):
+        return (time.monotonic_ns() // 1000000) & (self.period - 1)
+
+# VirtualClock class - only moves when advanced so code can run faster (or slower) than real time
+class VirtualClock():
+
+    # Initialisation
+    def __init__(self, start=0, period=TICKS_PERIOD):
+        self.period = period
+        self.now = start & (period - 1)
+
+    # Ticks function, returns the time in ms wrapped to the period
+    def ticks_ms(self):
+        return self.now
+
+    # Advance function, moves the clock on by ms
+    def advance(self, ms):
+        self.now = (self.now + ms) & (self.period - 1)
+        return self.now
+
+# Default clock function, returns a shared clock suited to the platform
+_default = None
+def default_clock():
+    global _default
+    if _default == None:
+        if supervisor != None:
+            _default = TicksClock()
+        else:
+            _default = MonotonicClock()
+    return _default
+
+# Clock classes (END)
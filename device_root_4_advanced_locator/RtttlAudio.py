@@ -0,0 +1,169 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import array
+import atexit
+try:
+    import audiopwmio
+    import synthio
+except ImportError:
+    audiopwmio = None
+    synthio = None
+
+# Import application modules
+from Piezo import VOLUME_MAX
+from Rtttl import Rtttl, PITCHES, STREAM_HZ_MASK, STREAM_MS_SHIFT
+
+# Audio settings
+_SAMPLE_RATE = const(22050)
+_TRACK_TEMPO = const(1000) # Track ticks per second, so note durations stay in ms
+_MIDI_C0 = const(12)
+_MIDI_NOTE_ON = const(0x90)
+_MIDI_NOTE_OFF = const(0x80)
+_MIDI_VELOCITY = const(0x7F)
+# Square wave amplitudes for volume levels 0 to VOLUME_MAX, 3dB steps to match Piezo
+_VOLUME_AMPLITUDE = (0, 1464, 2067, 2920, 4125, 5827, 8231, 11626, 16422, 23197, 32767)
+
+# RtttlAudio class
+# Plays whole tunes in the background as a synthio MIDI track through audiopwmio, so the melody
+# continues while the main loop is blocked. Falls back to note by note Rtttl playback on the piezo
+# when the audio modules are not available in the firmware.
+class RtttlAudio(Rtttl):
+
+    # Output function, creates the audio output (or the piezo without audio support)
+    def output(self, pin):
+        self.audio = None
+        self.piezo = None
+        if audiopwmio == None or synthio == None:
+            super().output(pin)
+        else:
+            self.audio = audiopwmio.PWMAudioOut(pin)
+            atexit.register(self.deinit)
+            # Single cycle square wave for each volume level
+            self.waveforms = tuple(array.array("h", (amplitude, -amplitude)) for amplitude in _VOLUME_AMPLITUDE)
+        if self.debug: print(f'RtttlAudio.output({pin}) = {self.audio != None}')
+
+    # Main function - call repeatedly, only checks for the end of background playback
+    def main(self):
+        if self.audio == None:
+            super().main()
+        # Finished playing ?
+        elif self.play_name != None:
+            if not self.audio.playing:
+                self.stop()
+
+    # Play tune function, parameters as Rtttl.play()
+    def play(self, tune_name, repeat, tempo=100, transpose=0, volume=VOLUME_MAX):
+        if self.audio == None:
+            return super().play(tune_name, repeat, tempo, transpose, volume)
+        result = super().play(tune_name, repeat, tempo, transpose, volume)
+        # Playable ? Replace the current track (otherwise it carries on)
+        if result:
+            self.audio.stop()
+            self.audio.play(self.track(), loop=repeat)
+        return result
+
+    # Stop tune function
+    def stop(self):
+        if self.audio != None:
+            self.audio.stop()
+        return super().stop()
+
+    # Seek function, the whole track is already playing so tunes restart from the beginning
+    def seek(self, index):
+        if self.audio == None:
+            return super().seek(index)
+        return False
+
+    # Track function, converts the tune selected by play() into a synthio MIDI track
+    # Transposition is applied as whole MIDI notes, the tuning() reference pitch is not applied
+    def track(self):
+        events = bytearray()
+        delay = 0
+        while self.play_index < self.play_count:
+            note = self.fetch()
+            hz = note & STREAM_HZ_MASK
+            ms = note >> STREAM_MS_SHIFT
+            if self.play_tempo != 100:
+                ms = (ms * 100) // self.play_tempo
+            # Note ? Turn on after any preceding rests and off before the articulation gap
+            if hz > 0 and ms > 0:
+                gap = ms - ((ms * self.play_articulation) // 100)
+                midi = min(127, max(0, self.midi(hz) + self.play_transpose))
+                self.delta(events, delay)
+                events.extend(bytes((_MIDI_NOTE_ON, midi, _MIDI_VELOCITY)))
+                self.delta(events, ms - gap)
+                events.extend(bytes((_MIDI_NOTE_OFF, midi, 0)))
+                delay = gap
+            # Rest
+            else:
+                delay += ms
+        # Trailing rests ? Hold the end of the track with a spare note off
+        if delay > 0:
+            self.delta(events, delay)
+            events.extend(bytes((_MIDI_NOTE_OFF, 0, 0)))
+        if self.debug: print(f'RtttlAudio.track("{self.play_name}") = {len(events)} bytes')
+        return synthio.MidiTrack(events, tempo=_TRACK_TEMPO, sample_rate=_SAMPLE_RATE, waveform=self.waveforms[max(0, min(VOLUME_MAX, self.play_volume))])
+
+    # Delta function, appends a MIDI variable length delta time
+    def delta(self, events, ticks):
+        shift = 21
+        while shift > 0 and (ticks >> shift) == 0:
+            shift -= 7
+        while shift > 0:
+            events.append(((ticks >> shift) & 0x7F) | 0x80)
+            shift -= 7
+        events.append(ticks & 0x7F)
+
+    # Midi function, returns the MIDI note nearest to a frequency
+    def midi(self, hz):
+        low = 0
+        high = len(PITCHES) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if PITCHES[middle] < hz:
+                low = middle + 1
+            else:
+                high = middle
+        if low > 0 and (hz - PITCHES[low - 1]) < (PITCHES[low] - hz):
+            low -= 1
+        return low + _MIDI_C0
+
+    # Deinit function
+    def deinit(self):
+        self.audio.stop()
+        self.audio.deinit()
+        atexit.deregister(self.deinit)
+        if self.debug: print(f'RtttlAudio.deinit({self.pin})')
+
+# RtttlAudio class (END)
@@ -0,0 +1,98 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import atexit
+import builtins
+import os
+import sys
+import time
+import types
+
+# Default device root containing the application modules
+ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "device_root_4_advanced_locator")
+
+# Host stand-in for pwmio.PWMOut, records the registers written
+class PWMOut():
+
+    # Initialisation
+    def __init__(self, pin, duty_cycle=0, frequency=500, variable_frequency=False):
+        self.pin = pin
+        self.duty_cycle = duty_cycle
+        self.frequency = frequency
+        self.variable_frequency = variable_frequency
+
+    # Deinit function
+    def deinit(self):
+        pass
+
+# Host stand-in for digitalio.DigitalInOut
+class DigitalInOut():
+
+    # Initialisation
+    def __init__(self, pin):
+        self.pin = pin
+        self.direction = None
+        self.value = True
+
+# Install function, registers host stand-ins for the CircuitPython modules used by the application modules
+# then makes the modules in root importable
+# board_id is reported by board.board_id, App.py only initialises on a supported board id
+def install(root, board_id="host"):
+    # MicroPython const() is a no-op on the host
+    builtins.const = lambda value: value
+    # atexit.deregister() is named unregister() on the host
+    if not hasattr(atexit, "deregister"):
+        atexit.deregister = atexit.unregister
+    # board - pins are just their names
+    board = types.ModuleType("board")
+    board.board_id = board_id
+    board.__getattr__ = lambda name: name
+    sys.modules.setdefault("board", board)
+    # pwmio
+    pwmio = types.ModuleType("pwmio")
+    pwmio.PWMOut = PWMOut
+    sys.modules.setdefault("pwmio", pwmio)
+    # digitalio
+    digitalio = types.ModuleType("digitalio")
+    digitalio.DigitalInOut = DigitalInOut
+    digitalio.Direction = types.SimpleNamespace(INPUT="INPUT", OUTPUT="OUTPUT")
+    sys.modules.setdefault("digitalio", digitalio)
+    # supervisor - ticks_ms() wraps at 2^29 like the device
+    supervisor = types.ModuleType("supervisor")
+    supervisor.ticks_ms = lambda: (time.monotonic_ns() // 1000000) & ((1 << 29) - 1)
+    sys.modules.setdefault("supervisor", supervisor)
+    # Application modules
+    root = os.path.abspath(root if root != None else ROOT)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    return root
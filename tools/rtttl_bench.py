@@ -0,0 +1,280 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import argparse
+import io
+import random
+import struct
+import sys
+import time
+import tracemalloc
+
+# Import tool modules
+import circuitpython
+from rtttl_compile import read_corpus
+from rtttl_freeze import TUNES
+
+# Octaves accepted by the original parser and by the current parser
+ORIGINAL_OCTAVES = range(4, 8)
+OCTAVES = range(0, 9)
+
+# Reference frequencies used by the reference parser
+REFERENCE_FREQUENCIES = {"p": 0}
+for _octave in range(0, 9):
+    for _index, _note in enumerate(("c", "c#", "d", "d#", "e", "f", "f#", "g", "g#", "a", "a#", "b")):
+        REFERENCE_FREQUENCIES[f'{_note}{_octave}'] = round(440 * 2 ** ((((_octave * 12) + _index) - 57) / 12))
+
+# Reference parser, the original string based Rtttl.load() extended to octaves 0 to 8 (or limited to octaves) returning (name, [(hz, ms), ...]) or (None, None)
+def reference_load(rtttl, octaves=OCTAVES):
+    rtttl = rtttl.replace(" ", "").lower()
+    rtttl_parts = rtttl.split(":")
+    if len(rtttl_parts) != 2 and len(rtttl_parts) != 3:
+        return None, None
+    name = rtttl_parts[0]
+    duration = 4
+    octave = 6
+    bpm = 63
+    notes_index = 1
+    if len(rtttl_parts) == 3:
+        notes_index = 2
+        for default in rtttl_parts[1].split(","):
+            for key, valid in (("d=", (1, 2, 4, 8, 16, 32)), ("o=", octaves), ("b=", range(25, 901))):
+                if default.find(key) == 0:
+                    try:
+                        value = int(default[2:])
+                    except ValueError:
+                        continue
+                    if value in valid:
+                        if key == "d=": duration = value
+                        elif key == "o=": octave = value
+                        else: bpm = value
+    whole_ms = (60000 * duration) // bpm
+    whole_ms //= 32
+    whole_ms *= 32
+    notes = []
+    for data in rtttl_parts[notes_index].split(","):
+        d_string = ""
+        p_string = ""
+        o_string = ""
+        dot = False
+        state = 0
+        index = 0
+        while index < len(data):
+            if state == 0:
+                if data[index] in "123468":
+                    d_string += data[index]
+                    index += 1
+                else:
+                    state = 1
+            elif state == 1:
+                if data[index] in "abcdefgp":
+                    p_string += data[index]
+                    index += 1
+                else:
+                    p_string += "p"
+                state = 4 if p_string == "p" else 2
+            elif state == 2:
+                if data[index] == "#":
+                    p_string += data[index]
+                    index += 1
+                else:
+                    state = 3
+            elif state == 3:
+                if data[index] in "0123456789" and int(data[index]) in octaves:
+                    if len(o_string) == 0:
+                        o_string += data[index]
+                elif data[index] == ".":
+                    dot = True
+                index += 1
+            else:
+                index += 1
+        if d_string not in ("1", "2", "4", "8", "16", "32"):
+            d_string = str(duration)
+        p_string += o_string if o_string != "" else str(octave)
+        ms = whole_ms // int(d_string)
+        if dot: ms += ms // 2
+        notes.append((REFERENCE_FREQUENCIES.get(p_string, 0), min(ms, 0xFFFF)))
+    if len(name) == 0:
+        return None, None
+    return name, notes
+
+# Built in tunes, the RTTTL source of the tunes frozen into each device root
+def builtin_tunes():
+    return [line for number, line in read_corpus([TUNES])]
+
+# Malformed defaults fields, mixed into some synthetic tunes
+MALFORMED_DEFAULTS = ("b23", "x=11", "d=", "o=9", "b=2000", "dd=4", "d=4x", "=8", "o5")
+
+# Synthetic corpus, well formed tunes of varying length with some malformed fields and sections
+def synthetic_tunes(count, seed, octaves=OCTAVES):
+    generator = random.Random(seed)
+    tunes = []
+    for index in range(count):
+        defaults = f'd={generator.choice((4, 8, 16))},o={generator.choice((4, 5, 6, 7))},b={generator.randint(25, 900)}'
+        if generator.random() < 0.2:
+            fields = defaults.split(",")
+            fields.insert(generator.randint(0, len(fields)), generator.choice(MALFORMED_DEFAULTS))
+            defaults = ",".join(fields)
+        notes = []
+        for note in range(generator.randint(20, 400)):
+            notes.append(generator.choice(("", "1", "2", "4", "8", "16", "32", "3", "64"))
+                + generator.choice("abcdefgpxh")
+                + generator.choice(("", "", "#", "##"))
+                + generator.choice([suffix for suffix in ("", "", "4", "5", "6", "7", "8", ".", ".5", "6.", " ") if not suffix.strip(". ") or int(suffix.strip(". ")) in octaves]))
+        if generator.random() < 0.05:
+            notes.insert(generator.randint(0, len(notes)), f'{generator.choice(notes)}:{generator.choice(notes)}')
+        tunes.append(f'tune{index}:{defaults}:{",".join(notes)}' if generator.random() < 0.9 else f'tune{index}:{",".join(notes)}')
+    return tunes
+
+# Unpack function, returns the (hz, ms) records of a loaded tune
+def unpack(rtttl, name):
+    return list(struct.iter_unpack("<HH", rtttl.tunes[name]))
+
+# Unload all function, empties the Rtttl instance between tunes
+def unload_all(rtttl):
+    for name in list(rtttl.tune_names):
+        rtttl.unload(name)
+
+# Streamed function, plays a tune from a file returning (name, [(hz, ms), ...]) or (None, None)
+def streamed(rtttl, tune):
+    from Rtttl import STREAM_HZ_MASK, STREAM_MS_SHIFT
+    if not rtttl.play(io.BytesIO(tune.encode()), False):
+        return None, None
+    notes = []
+    while rtttl.play_index < rtttl.play_count:
+        note = rtttl.fetch()
+        notes.append((note & STREAM_HZ_MASK, note >> STREAM_MS_SHIFT))
+    name = rtttl.play_name
+    rtttl.stop()
+    return name, notes
+
+# Parsed function, parses a file without knowing its sections returning (name, [(hz, ms), ...]) or (None, None)
+def parsed(rtttl, tune):
+    from Rtttl import STREAM_HZ_MASK, STREAM_MS_SHIFT
+    parser = rtttl.parse(io.BytesIO(tune.encode()), None, False)
+    name = next(parser)
+    notes = [(note & STREAM_HZ_MASK, note >> STREAM_MS_SHIFT) for note in parser]
+    if name == None or len(name) == 0 or len(notes) == 0:
+        return None, None
+    return name, notes
+
+# Conformance check, returns a list of failure descriptions
+def conformance(rtttl, tunes, octaves=OCTAVES):
+    failures = []
+    for tune in tunes:
+        unload_all(rtttl)
+        name = rtttl.load(tune, False)
+        expect_name, expect_notes = reference_load(tune, octaves)
+        # Streamed from a file
+        if streamed(rtttl, tune) != (expect_name, expect_notes):
+            failures.append(f'streamed notes differ: {tune[:60]}')
+            continue
+        # Parsed from a file with up to two sections held until known (more sections end the tune early)
+        if tune.count(":") <= 2 and parsed(rtttl, tune) != (expect_name, expect_notes):
+            failures.append(f'parsed notes differ: {tune[:60]}')
+            continue
+        if name != expect_name:
+            failures.append(f'name {name!r} != {expect_name!r}: {tune[:60]}')
+            continue
+        if name == None:
+            continue
+        notes = unpack(rtttl, name)
+        if notes != expect_notes:
+            failures.append(f'notes differ: {tune[:60]}')
+            continue
+        # Compiled round trip
+        compiled = bytes(rtttl.compile(name))
+        unload_all(rtttl)
+        if rtttl.load_compiled(compiled, False) != name or unpack(rtttl, name) != notes:
+            failures.append(f'compiled round trip differs: {tune[:60]}')
+    return failures
+
+# Benchmark function, returns (notes per second, peak bytes allocated per parse)
+def benchmark(load, tunes, notes, repeat):
+    start = time.perf_counter()
+    for index in range(repeat):
+        for tune in tunes:
+            load(tune)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    peak = 0
+    for tune in tunes:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        load(tune)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return (notes * repeat) / elapsed, peak
+
+# Main function
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Rtttl.load() and check it against the original parser extended to octaves 0 to 8")
+    parser.add_argument("--root", default=None, help="device root holding Rtttl.py (default: advanced locator)")
+    parser.add_argument("--count", type=int, default=500, help="synthetic corpus size")
+    parser.add_argument("--seed", type=int, default=1, help="synthetic corpus seed")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats")
+    parser.add_argument("--original", action="store_true", help="check against the original octave range (4 to 7)")
+    args = parser.parse_args()
+
+    circuitpython.install(args.root)
+    from Rtttl import Rtttl
+    rtttl = Rtttl("host", False)
+    octaves = ORIGINAL_OCTAVES if args.original else OCTAVES
+    suites = (("built in", builtin_tunes()), ("synthetic", synthetic_tunes(args.count, args.seed, octaves)))
+
+    # Conformance
+    failed = False
+    for suite, tunes in suites:
+        failures = conformance(rtttl, tunes, octaves)
+        print(f'conformance {suite}: {len(tunes) - len(failures)}/{len(tunes)} ok')
+        for failure in failures[:10]:
+            print(f'  {failure}')
+        failed = failed or len(failures) > 0
+
+    # Throughput and allocations
+    def load(tune):
+        unload_all(rtttl)
+        rtttl.load(tune, False)
+    # Repeat loads of text that is already loaded
+    def load_interned(tune):
+        rtttl.load(tune, False)
+    print(f'{"suite":<10} {"parser":<10} {"notes/s":>12} {"peak bytes":>12}')
+    for suite, tunes in suites:
+        notes = sum(len(reference_load(tune)[1] or ()) for tune in tunes)
+        for parser_name, function in (("Rtttl", load), ("interned", load_interned), ("reference", reference_load)):
+            rate, peak = benchmark(function, tunes, notes, args.repeat)
+            print(f'{suite:<10} {parser_name:<10} {rate:>12.0f} {peak:>12}')
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import argparse
+import csv
+import multiprocessing
+import os
+import struct
+import sys
+import time
+
+# Import tool modules
+import circuitpython
+
+# Worker state (one Rtttl instance per process)
+rtttl = None
+note_format = None
+
+# Worker initialisation
+def init(root):
+    global rtttl, note_format
+    circuitpython.install(root)
+    import Rtttl
+    rtttl = Rtttl.Rtttl("host", False)
+    note_format = Rtttl.COMPILED_NOTE
+
+# Worker compile function, returns (line number, name, compiled tune, notes, duration ms, error)
+def compile_line(job):
+    number, line = job
+    try:
+        name = rtttl.load(line, False)
+    except Exception as error:
+        return (number, None, None, 0, 0, f'{type(error).__name__}: {error}')
+    if name == None:
+        return (number, None, None, 0, 0, "invalid")
+    count = rtttl.count(name)
+    duration = sum(ms for hz, ms in struct.iter_unpack(note_format, rtttl.tunes[name]))
+    compiled = rtttl.compile(name)
+    # Unload the tune so worker memory stays flat
+    rtttl.unload(name)
+    if compiled == None:
+        return (number, name, None, count, duration, "name too long")
+    return (number, name, bytes(compiled), count, duration, None)
+
+# Corpus reader, yields (line number, rtttl) skipping blank and comment lines
+def read_corpus(paths):
+    for path in paths:
+        with (sys.stdin if path == "-" else open(path, encoding="utf-8", errors="replace")) as file:
+            for number, line in enumerate(file, 1):
+                line = line.strip().strip('"')
+                if len(line) > 0 and not line.startswith("#"):
+                    yield (f'{path}:{number}', line)
+
+# Safe file name for a tune
+def file_name(name):
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in name) or "_"
+
+# Main function
+def main():
+    parser = argparse.ArgumentParser(description="Compile an RTTTL corpus (one tune per line) with Rtttl.load() semantics")
+    parser.add_argument("corpus", nargs="+", help="RTTTL text files, - for stdin")
+    parser.add_argument("--root", default=None, help="device root holding Rtttl.py (default: advanced locator)")
+    parser.add_argument("--output", default=None, help="directory for one compiled .rtc file per tune")
+    parser.add_argument("--library", default=None, help="library file to write holding every compiled tune")
+    parser.add_argument("--report", default=None, help="CSV report of every line (default: failures to stderr)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--chunksize", type=int, default=256, help="lines per worker task")
+    args = parser.parse_args()
+
+    # Host Rtttl used to write the library
+    root = circuitpython.install(args.root)
+    from Rtttl import Rtttl
+    library = Rtttl("host", False) if args.library != None else None
+    if args.output != None:
+        os.makedirs(args.output, exist_ok=True)
+    report = None
+    if args.report != None:
+        report_file = open(args.report, "w", newline="")
+        report = csv.writer(report_file)
+        report.writerow(("line", "name", "status", "notes", "bytes", "duration_ms"))
+
+    start = time.perf_counter()
+    totals = {"ok": 0, "duplicate": 0, "failed": 0}
+    names = set()
+    with multiprocessing.Pool(args.jobs, init, (root,)) as pool:
+        for number, name, compiled, count, duration, error in pool.imap(compile_line, read_corpus(args.corpus), args.chunksize):
+            if error != None:
+                status = error
+                totals["failed"] += 1
+                if report == None: print(f'{number}: {error}', file=sys.stderr)
+            elif name in names:
+                status = "duplicate"
+                totals["duplicate"] += 1
+            else:
+                status = "ok"
+                totals["ok"] += 1
+                names.add(name)
+                if args.output != None:
+                    with open(os.path.join(args.output, file_name(name) + ".rtc"), "wb") as file:
+                        file.write(compiled)
+                if library != None:
+                    library.load_compiled(compiled, False)
+            if report != None:
+                report.writerow((number, name if name != None else "", status, count, len(compiled) if compiled != None else 0, duration))
+    if library != None:
+        library.save_library(args.library, library.tune_names)
+    if report != None:
+        report_file.close()
+    elapsed = time.perf_counter() - start
+    lines = sum(totals.values())
+    print(f'{lines} tunes in {elapsed:.2f}s ({lines / elapsed if elapsed > 0 else 0:.0f}/s): {totals["ok"]} ok, {totals["duplicate"]} duplicate, {totals["failed"]} failed', file=sys.stderr)
+    return 1 if lines == 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
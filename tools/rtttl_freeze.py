@@ -0,0 +1,111 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import argparse
+import glob
+import os
+import sys
+
+# Import tool modules
+import circuitpython
+from rtttl_compile import read_corpus
+
+# Default tune source and device roots
+TUNES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tunes.txt")
+ROOTS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "device_root_*")))
+
+# Constant name for a tune
+def constant_name(name):
+    return "TUNE_" + "".join(char if char.isalnum() else "_" for char in name.upper())
+
+# Freeze function, returns the source of a module holding each tune as a compiled bytes constant
+def freeze(rtttl, corpus, header):
+    lines = []
+    names = []
+    errors = []
+    for number, line in read_corpus(corpus):
+        name = rtttl.load(line, False)
+        compiled = rtttl.compile(name) if name != None else None
+        if compiled == None:
+            errors.append(f'{number}: invalid')
+        elif constant_name(name) in names:
+            errors.append(f'{number}: duplicate "{name}"')
+        else:
+            names.append(constant_name(name))
+            lines.append(f'# {line}')
+            lines.append(f'{constant_name(name)} = {bytes(compiled)!r}')
+    lines.append("")
+    lines.append("# All tunes")
+    lines.append(f'TUNES = ({", ".join(names)}{"," if len(names) == 1 else ""})')
+    return header + "\n".join(lines) + "\n", errors
+
+# Main function
+def main():
+    parser = argparse.ArgumentParser(description="Freeze RTTTL tunes into a module of compiled bytes constants in each device root")
+    parser.add_argument("corpus", nargs="*", default=[TUNES], help="RTTTL text files, one tune per line (default: tools/tunes.txt)")
+    parser.add_argument("--root", action="append", default=None, help="device root to write (default: every device root)")
+    parser.add_argument("--module", default="Tunes.py", help="generated module name")
+    parser.add_argument("--check", action="store_true", help="only check the generated modules are up to date")
+    args = parser.parse_args()
+
+    circuitpython.install(None)
+    from Rtttl import Rtttl
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "circuitpython.py")) as file:
+        license = file.read().split('"""')[1]
+    header = f'"""{license}"""\n# Generated by tools/rtttl_freeze.py, do not edit\n# Compiled tunes for Rtttl.load_compiled()\n'
+    source, errors = freeze(Rtttl("host", False), args.corpus, header)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if len(errors) > 0:
+        return 1
+
+    result = 0
+    for root in args.root if args.root != None else ROOTS:
+        path = os.path.join(root, args.module)
+        current = None
+        if os.path.exists(path):
+            with open(path) as file:
+                current = file.read()
+        if current == source:
+            print(f'{path}: up to date', file=sys.stderr)
+        elif args.check:
+            print(f'{path}: out of date', file=sys.stderr)
+            result = 1
+        else:
+            with open(path, "w", newline="\n") as file:
+                file.write(source)
+            print(f'{path}: written', file=sys.stderr)
+    return result
+
+if __name__ == "__main__":
+    sys.exit(main())
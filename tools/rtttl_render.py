@@ -0,0 +1,145 @@
+"""
+*****************************************************************************
+Copyright 2023 Silicon Laboratories Inc. www.silabs.com
+*****************************************************************************
+SPDX-License-Identifier: Zlib
+
+The licensor of this software is Silicon Laboratories Inc.
+
+This software is provided \'as-is\', without any express or implied
+warranty. In no event will the authors be held liable for any damages
+arising from the use of this software.
+
+Permission is granted to anyone to use this software for any purpose,
+including commercial applications, and to alter it and redistribute it
+freely, subject to the following restrictions:
+
+1. The origin of this software must not be misrepresented; you must not
+   claim that you wrote the original software. If you use this software
+   in a product, an acknowledgment in the product documentation would be
+   appreciated but is not required.
+2. Altered source versions must be plainly marked as such, and must not be
+   misrepresented as being the original software.
+3. This notice may not be removed or altered from any source distribution.
+
+*****************************************************************************
+# EXPERIMENTAL QUALITY
+This code has not been formally tested and is provided as-is. It is not
+suitable for production environments. In addition, this code will not be
+maintained and there may be no bug maintenance planned for these resources.
+Silicon Labs may update projects from time to time.
+******************************************************************************
+"""
+# Import core modules
+import argparse
+import csv
+import os
+import sys
+import time
+import wave
+
+# Import third party modules
+import numpy
+
+# Import tool modules
+import circuitpython
+
+# Render function, returns the 16 bit samples of a compiled tune's notes as played by Piezo
+# Piezo drives a 50% duty square wave, restarting the PWM period at each note and silent outside C0 to B8
+def render(notes, rate, amplitude, low, high):
+    records = numpy.frombuffer(notes, dtype="<u2").reshape(-1, 2)
+    hz = records[:, 0].astype(numpy.float64)
+    hz[(hz < low) | (hz > high)] = 0
+    # Note boundaries from the running total so rounding does not accumulate
+    ends = numpy.rint(numpy.cumsum(records[:, 1], dtype=numpy.int64) * (rate / 1000)).astype(numpy.int64)
+    counts = numpy.diff(ends, prepend=0)
+    starts = ends - counts
+    frequency = numpy.repeat(hz, counts)
+    cycles = (numpy.arange(ends[-1], dtype=numpy.float64) - numpy.repeat(starts, counts)) * frequency / rate
+    samples = numpy.where(numpy.modf(cycles)[0] < 0.5, amplitude, -amplitude).astype("<i2")
+    samples[frequency == 0] = 0
+    return samples
+
+# Write WAV function, 16 bit mono
+def write_wav(path, samples, rate):
+    with wave.open(path, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(samples.tobytes())
+
+# Tune reader, yields (path, name, notes) for compiled tune (.rtc) and tune library (.rtl) files
+def read_tunes(rtttl, paths, library_magic):
+    for path in paths:
+        with open(path, "rb") as file:
+            buf = file.read()
+        # Library ? Load each tune in turn
+        if buf[:len(library_magic)] == library_magic:
+            rtttl.library.clear()
+            rtttl.open_library(path, False)
+            for name in list(rtttl.library):
+                if rtttl.load_library(name, False) == name:
+                    notes = bytes(rtttl.tunes[name])
+                    rtttl.unload(name)
+                    yield (path, name, notes)
+                else:
+                    yield (path, name, None)
+        # Compiled tune
+        else:
+            name, notes = rtttl.unpack(buf)
+            yield (path, name, bytes(notes) if notes != None else None)
+
+# Safe file name for a tune
+def file_name(name):
+    return "".join(char if char.isalnum() or char in "-_" else "_" for char in name) or "_"
+
+# Main function
+def main():
+    parser = argparse.ArgumentParser(description="Render compiled RTTTL tunes to WAV as played on the piezo")
+    parser.add_argument("tunes", nargs="+", help="compiled tune (.rtc) or tune library (.rtl) files")
+    parser.add_argument("--root", default=None, help="device root holding Rtttl.py (default: advanced locator)")
+    parser.add_argument("--output", default=None, help="directory for one .wav file per tune (default: render only)")
+    parser.add_argument("--report", default=None, help="CSV report of the notes and durations of every tune")
+    parser.add_argument("--rate", type=int, default=44100, help="sample rate")
+    parser.add_argument("--volume", type=float, default=0.5, help="amplitude from 0 to 1")
+    args = parser.parse_args()
+
+    circuitpython.install(args.root)
+    from Rtttl import Rtttl, PITCHES, LIBRARY_MAGIC, COMPILED_NOTE_SIZE
+    rtttl = Rtttl("host", False)
+    amplitude = int(max(0.0, min(1.0, args.volume)) * 32767)
+    if args.output != None:
+        os.makedirs(args.output, exist_ok=True)
+    report = None
+    if args.report != None:
+        report_file = open(args.report, "w", newline="")
+        report = csv.writer(report_file)
+        report.writerow(("file", "name", "status", "notes", "duration_ms", "samples", "rendered_ms"))
+
+    start = time.perf_counter()
+    totals = {"ok": 0, "failed": 0}
+    seconds = 0
+    for path, name, notes in read_tunes(rtttl, args.tunes, LIBRARY_MAGIC):
+        if notes == None:
+            totals["failed"] += 1
+            if report != None:
+                report.writerow((path, name if name != None else "", "invalid", 0, 0, 0, 0))
+            else:
+                print(f'{path}: invalid', file=sys.stderr)
+            continue
+        samples = render(notes, args.rate, amplitude, PITCHES[0], PITCHES[-1])
+        totals["ok"] += 1
+        seconds += len(samples) / args.rate
+        if args.output != None:
+            write_wav(os.path.join(args.output, file_name(name) + ".wav"), samples, args.rate)
+        if report != None:
+            duration = int(numpy.frombuffer(notes, dtype="<u2")[1::2].sum(dtype=numpy.int64))
+            report.writerow((path, name, "ok", len(notes) // COMPILED_NOTE_SIZE, duration, len(samples), round(len(samples) * 1000 / args.rate)))
+    if report != None:
+        report_file.close()
+    elapsed = time.perf_counter() - start
+    print(f'{totals["ok"]} tunes ({seconds:.0f}s of audio) rendered in {elapsed:.2f}s: {totals["failed"]} failed', file=sys.stderr)
+    return 1 if totals["failed"] > 0 or totals["ok"] == 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())